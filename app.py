@@ -1,12 +1,28 @@
+import gzip
+import hashlib
+import json
 import os
-from datetime import datetime
-from flask import Flask, render_template, request, jsonify, redirect, url_for, Response, send_from_directory, abort
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from flask import Flask, render_template, request, jsonify, redirect, url_for, Response, send_from_directory, abort, g
+import click
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.sql import func
-from sqlalchemy import text
-
-from scraper import auto_detect, extract_items_with_mapping
-from rss_utils import generate_rss
+from sqlalchemy import event, make_url, text
+
+from scraper import (auto_detect, extract_items_with_mapping, dates_to_iso, stream_html, HTML_CACHE_TTL,
+                     PAGE_MEMORY_CACHE, ARTICLE_SELECTOR_CACHE)
+from rss_utils import render_rss, render_feed, items_digest, compress, item_key, content_hash
+from feed_writer import FORMATS
+from dates import parse_date
+from refresher import FeedRefresher, RefreshJob, scrape_batch
+from singleflight import SingleFlight, LOCK_DIR
+from picker_proxy import PickerRewriter
+from opml import read_opml, write_opml
+from migrations import migrate
+from fetcher import default_fetcher
+import metrics
 
 # ----------------------------------------------------------------------------
 # Configuration
@@ -15,14 +31,77 @@ from rss_utils import generate_rss
 db_path = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'database.db')
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', f'sqlite:///{db_path}')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# SQLite shared by several workers: WAL lets readers run while a feed is being
+# written, and writers wait up to SQLITE_BUSY_TIMEOUT_MS for the write lock
+# instead of failing with "database is locked". Use SQLITE_JOURNAL_MODE=DELETE
+# where WAL is not supported (network filesystems).
+app.config['SQLITE_JOURNAL_MODE'] = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 10000))
+# Pooled connections per process (request threads, refresh workers). In-memory
+# SQLite uses a single shared connection (StaticPool), which takes no sizes.
+_db_url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+if not (_db_url.get_backend_name() == 'sqlite'
+        and (_db_url.database in (None, '', ':memory:') or _db_url.query.get('mode') == 'memory')):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_POOL_OVERFLOW', 10)),
+    }
+
+# Background refresh: feeds are rebuilt every FEED_REFRESH_INTERVAL seconds
+# unless the feed sets its own refresh_interval.
+app.config['FEED_REFRESH_ENABLED'] = os.environ.get('FEED_REFRESH_ENABLED', '1') != '0'
+app.config['FEED_REFRESH_INTERVAL'] = int(os.environ.get('FEED_REFRESH_INTERVAL', 900))
+app.config['FEED_REFRESH_POLL'] = int(os.environ.get('FEED_REFRESH_POLL', 30))
+app.config['FEED_REFRESH_WORKERS'] = int(os.environ.get('FEED_REFRESH_WORKERS', 4))
+
+# Items rendered per feed and items remembered per feed in the item store
+app.config['FEED_ITEM_LIMIT'] = 50
+app.config['ITEM_STORE_LIMIT'] = int(os.environ.get('ITEM_STORE_LIMIT', 200))
+
+# Picker proxy: pages larger than this many characters are cut off, and page
+# scripts/iframes are stripped unless the request passes ?scripts=1
+app.config['PROXY_MAX_CHARS'] = int(os.environ.get('PROXY_MAX_CHARS', 5 * 1024 * 1024))
+app.config['PROXY_STRIP_SCRIPTS'] = os.environ.get('PROXY_STRIP_SCRIPTS', '1') != '0'
+
+# In-process caches: fetched pages and per-host article selectors, bounded by
+# bytes (least recently used entries are evicted first)
+app.config['PAGE_MEMORY_CACHE_BYTES'] = PAGE_MEMORY_CACHE.max_bytes
+app.config['PAGE_MEMORY_CACHE_COMPRESS'] = PAGE_MEMORY_CACHE.compress
+app.config['ARTICLE_SELECTOR_CACHE_BYTES'] = ARTICLE_SELECTOR_CACHE.max_bytes
+app.config['ARTICLE_SELECTOR_CACHE_TTL'] = ARTICLE_SELECTOR_CACHE.ttl
+
+# Feeds per page on the dashboard and in GET /api/feeds (?per_page= up to the max)
+app.config['FEEDS_PER_PAGE'] = int(os.environ.get('FEEDS_PER_PAGE', 50))
+app.config['FEEDS_PER_PAGE_MAX'] = int(os.environ.get('FEEDS_PER_PAGE_MAX', 500))
+
+# POST /api/preview/batch: URLs per request and how many are scraped at once
+app.config['PREVIEW_BATCH_MAX'] = int(os.environ.get('PREVIEW_BATCH_MAX', 100))
+app.config['PREVIEW_BATCH_WORKERS'] = int(os.environ.get('PREVIEW_BATCH_WORKERS', 8))
+
+# Add a Server-Timing header (per-stage durations) to feed XML and preview responses
+app.config['SERVER_TIMING'] = os.environ.get('SERVER_TIMING', '0') == '1'
+
 # Disable Jinja2 auto-escape for inline JS injection (we will keep templates simple)
 app.jinja_env.autoescape = True
 
 db = SQLAlchemy(app)
 
+
+def _configure_sqlite(dbapi_conn, _record):
+    cursor = dbapi_conn.cursor()
+    cursor.execute(f"PRAGMA journal_mode={app.config['SQLITE_JOURNAL_MODE']}")
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute(f"PRAGMA busy_timeout={app.config['SQLITE_BUSY_TIMEOUT_MS']}")
+    cursor.close()
+
+
+with app.app_context():
+    if db.engine.dialect.name == 'sqlite':
+        event.listen(db.engine, 'connect', _configure_sqlite)
+
 # ----------------------------------------------------------------------------
 # Database Models
 # ----------------------------------------------------------------------------
@@ -32,7 +111,7 @@ class Feed(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
-    url = db.Column(db.String(2048), nullable=False)
+    url = db.Column(db.String(2048), nullable=False, index=True)
 
     # CSS selectors
     item_selector = db.Column(db.String(512), nullable=False)
@@ -42,6 +121,14 @@ class Feed(db.Model):
     date_selector = db.Column(db.String(512), nullable=True)
     author_selector = db.Column(db.String(512), nullable=True)
     image_selector = db.Column(db.String(512), nullable=True)
+    # Link to the next listing page; when empty, rel="next" / "Older posts" links are used
+    next_page_selector = db.Column(db.String(512), nullable=True)
+
+    # Seconds between background rebuilds; None uses FEED_REFRESH_INTERVAL
+    refresh_interval = db.Column(db.Integer, nullable=True)
+
+    snapshot = db.relationship('FeedSnapshot', uselist=False, cascade='all, delete-orphan')
+    items = db.relationship('Item', cascade='all, delete-orphan', lazy='dynamic')
 
     created_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
     updated_at = db.Column(db.DateTime(timezone=True), onupdate=func.now())
@@ -58,21 +145,375 @@ class Feed(db.Model):
             'date_selector': self.date_selector,
             'author_selector': self.author_selector,
             'image_selector': self.image_selector,
+            'next_page_selector': self.next_page_selector,
+            'refresh_interval': self.refresh_interval,
+        }
+
+    def mapping(self):
+        return {
+            'item_selector': self.item_selector,
+            'title_selector': self.title_selector,
+            'link_selector': self.link_selector,
+            'content_selector': self.content_selector,
+            'date_selector': self.date_selector,
+            'author_selector': self.author_selector,
+            'image_selector': self.image_selector,
+            'next_page_selector': self.next_page_selector,
+        }
+
+
+# Columns set from API / import payloads
+FEED_FIELDS = ('name', 'url', 'item_selector', 'title_selector', 'link_selector', 'content_selector',
+               'date_selector', 'author_selector', 'image_selector', 'next_page_selector', 'refresh_interval')
+REQUIRED_FEED_FIELDS = ('name', 'url', 'item_selector')
+# Fields that decide which items a feed has; changing one empties its item store
+ITEM_IDENTITY_FIELDS = ('url', 'item_selector', 'link_selector')
+
+
+class FeedSnapshot(db.Model):
+    """Last rendered RSS document for a feed, served directly by /feeds/<id>.xml."""
+    __tablename__ = 'feed_snapshots'
+
+    feed_id = db.Column(db.Integer, db.ForeignKey('feeds.id'), primary_key=True)
+    xml = db.Column(db.LargeBinary, nullable=True)
+    xml_gz = db.Column(db.LargeBinary, nullable=True)   # gzip of xml, served as-is
+    etag = db.Column(db.String(64), nullable=True)      # hash of the item list
+    built_at = db.Column(db.DateTime, nullable=True)    # last successful build (UTC)
+    checked_at = db.Column(db.DateTime, nullable=True)  # last build attempt (UTC)
+    modified_at = db.Column(db.DateTime, nullable=True) # last time the items changed (UTC)
+    last_error = db.Column(db.Text, nullable=True)
+
+
+class Item(db.Model):
+    """An item seen on a feed's source page, kept after it scrolls off the page."""
+    __tablename__ = 'items'
+    __table_args__ = (
+        db.UniqueConstraint('feed_id', 'key', name='uq_items_feed_key'),
+        db.Index('ix_items_feed_sort', 'feed_id', 'sort_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    feed_id = db.Column(db.Integer, db.ForeignKey('feeds.id'), nullable=False)
+    key = db.Column(db.String(40), nullable=False)  # hash of the normalized link
+    content_hash = db.Column(db.String(32), nullable=False)
+
+    title = db.Column(db.Text, nullable=False)
+    link = db.Column(db.String(2048), nullable=False)
+    content = db.Column(db.Text, nullable=True)
+    author = db.Column(db.String(512), nullable=True)
+    image = db.Column(db.String(2048), nullable=True)
+
+    published_at = db.Column(db.DateTime, nullable=True)    # from the page (UTC)
+    first_seen_at = db.Column(db.DateTime, nullable=False)  # first scrape that found it (UTC)
+    sort_at = db.Column(db.DateTime, nullable=False)        # published_at or first_seen_at
+
+    def as_entry(self):
+        return {
+            'guid': self.link,
+            'title': self.title,
+            'link': self.link,
+            'content': self.content,
+            'date': self.published_at or self.first_seen_at,
+            'author': self.author,
+            'image': self.image,
         }
 
 # ----------------------------------------------------------------------------
 # Utility functions
 # ----------------------------------------------------------------------------
 
+def configure_caches():
+    """Apply the cache settings in app.config (call again after changing them)."""
+    PAGE_MEMORY_CACHE.configure(max_bytes=app.config['PAGE_MEMORY_CACHE_BYTES'],
+                                compress=app.config['PAGE_MEMORY_CACHE_COMPRESS'])
+    ARTICLE_SELECTOR_CACHE.configure(max_bytes=app.config['ARTICLE_SELECTOR_CACHE_BYTES'],
+                                     ttl=app.config['ARTICLE_SELECTOR_CACHE_TTL'])
+
+
+def _blank_to_none(value):
+    return (value.strip() or None) if isinstance(value, str) else value
+
+
+def clean_feed_fields(data):
+    """The ``FEED_FIELDS`` present in a payload, type-checked and normalized.
+
+    Strings are stripped and empty ones become None; ``refresh_interval``
+    must be a positive integer or null. Raises ValueError naming the field.
+    """
+    fields = {}
+    for field in FEED_FIELDS:
+        if field not in data:
+            continue
+        value = data[field]
+        if field == 'refresh_interval':
+            if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value < 1):
+                raise ValueError('Invalid refresh_interval: expected a positive integer or null')
+        elif value is not None:
+            if not isinstance(value, str):
+                raise ValueError(f'Invalid {field}: expected a string')
+            value = _blank_to_none(value)
+        if value is None and field in REQUIRED_FEED_FIELDS:
+            raise ValueError(f'Missing {field}')
+        fields[field] = value
+    return fields
+
+
+def new_feed(data):
+    """Unsaved Feed from an API or import payload; ValueError if a field is missing or invalid."""
+    if not isinstance(data, dict) or not all(field in data for field in REQUIRED_FEED_FIELDS):
+        raise ValueError('Missing required fields')
+    return Feed(**clean_feed_fields(data))
+
+
+def feeds_page():
+    """Page of feeds (by id) selected by the ``page`` and ``per_page`` query arguments."""
+    per_page = request.args.get('per_page', app.config['FEEDS_PER_PAGE'], type=int)
+    return db.paginate(db.select(Feed).order_by(Feed.id), per_page=per_page,
+                       max_per_page=app.config['FEEDS_PER_PAGE_MAX'], error_out=False)
+
+
+def preview_batch_entries(data):
+    """[(url, mapping, limit)] from a batch preview body; ValueError describes the first problem."""
+    previews = data.get('previews') if isinstance(data, dict) else None
+    if not isinstance(previews, list) or not previews:
+        raise ValueError('Missing previews')
+    if len(previews) > app.config['PREVIEW_BATCH_MAX']:
+        raise ValueError(f"At most {app.config['PREVIEW_BATCH_MAX']} previews per request")
+    entries = []
+    for index, entry in enumerate(previews):
+        if not isinstance(entry, dict) or not entry.get('url') or not entry.get('mapping'):
+            raise ValueError(f'Missing url or mapping in previews[{index}]')
+        limit = entry.get('limit', 20)
+        if not isinstance(limit, int) or limit < 1:
+            raise ValueError(f'Invalid limit in previews[{index}]')
+        entries.append((entry['url'], entry['mapping'], min(limit, app.config['FEED_ITEM_LIMIT'])))
+    return entries
+
+
+def preview_line(index, url, items=None, error=None):
+    """One NDJSON line of a batch preview response."""
+    line = {'index': index, 'url': url}
+    if error is not None:
+        line['error'] = error
+    else:
+        line['items'] = dates_to_iso(items)
+    return json.dumps(line, ensure_ascii=False) + '\n'
+
+
 def init_db():
+    configure_caches()
     with app.app_context():
-        db.create_all()
-        # Add image_selector column if DB existed before
+        with db.engine.begin() as conn:
+            applied = migrate(conn, db.metadata)
+        if applied:
+            print(f"Applied {applied} schema migration(s)")
+
+
+def _utcnow():
+    return datetime.utcnow()
+
+
+def _interval_seconds(value):
+    """A stored refresh_interval in seconds; the default when unset or not a positive integer."""
+    try:
+        interval = int(value)
+    except (TypeError, ValueError):
+        return app.config['FEED_REFRESH_INTERVAL']
+    return interval if interval > 0 else app.config['FEED_REFRESH_INTERVAL']
+
+
+def refresh_interval_for(feed):
+    return _interval_seconds(feed.refresh_interval)
+
+
+def is_stale(snapshot, interval):
+    """True if no build was attempted within the last ``interval`` seconds."""
+    if snapshot is None or snapshot.checked_at is None:
+        return True
+    return (_utcnow() - snapshot.checked_at).total_seconds() >= interval
+
+
+def failed_recently(snapshot, interval):
+    """True if the feed has no XML and its last build failed within ``interval`` seconds.
+
+    Readers then get the stored error; retrying is left to the scheduler.
+    """
+    return (snapshot is not None and (snapshot.xml is None or snapshot.etag is None)
+            and snapshot.last_error is not None and not is_stale(snapshot, interval))
+
+
+def _as_utc(value):
+    """Naive UTC datetime from an ISO string or datetime (None if unparsable)."""
+    if isinstance(value, str):
         try:
-            with db.engine.begin() as conn:
-                conn.exec_driver_sql("ALTER TABLE feeds ADD COLUMN image_selector VARCHAR(512)")
-        except Exception:
-            pass  # column exists or other
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def store_items(feed, items):
+    """Upsert scraped items into the item store; returns the number of new items.
+
+    Items are keyed by their normalized link, so unchanged items cost one
+    hash comparison and items keep their first-seen time across scrapes.
+    """
+    now = _utcnow()
+    scraped = {}
+    for itm in items:
+        scraped.setdefault(item_key(itm['link']), itm)
+    if not scraped:
+        return 0
+    existing = {row.key: row for row in
+                Item.query.filter(Item.feed_id == feed.id, Item.key.in_(list(scraped)))}
+
+    new = 0
+    for key, itm in scraped.items():
+        digest = content_hash(itm)
+        row = existing.get(key)
+        if row is None:
+            row = Item(feed_id=feed.id, key=key, first_seen_at=now)
+            db.session.add(row)
+            new += 1
+        elif row.content_hash == digest:
+            continue
+        row.content_hash = digest
+        row.title = itm['title']
+        row.link = itm['link']
+        row.content = itm.get('content')
+        row.author = itm.get('author')
+        row.image = itm.get('image')
+        row.published_at = _as_utc(itm.get('date'))
+        row.sort_at = row.published_at or row.first_seen_at
+
+    if new:
+        db.session.flush()
+        expired = [item_id for item_id, in db.session.query(Item.id)
+                   .filter(Item.feed_id == feed.id)
+                   .order_by(Item.sort_at.desc(), Item.id.asc())
+                   .offset(app.config['ITEM_STORE_LIMIT'])]
+        if expired:
+            Item.query.filter(Item.id.in_(expired)).delete(synchronize_session=False)
+    return new
+
+
+def seen_items(feed):
+    """``seen(link)`` for the crawler: True if the feed's item store has the item."""
+    keys = {key for key, in db.session.query(Item.key).filter(Item.feed_id == feed.id)}
+    return lambda link: item_key(link) in keys
+
+
+def latest_items(feed, limit, since=None):
+    """Newest stored items of a feed (served by the feed_id/sort_at index), optionally only those after ``since``."""
+    query = feed.items
+    if since is not None:
+        query = query.filter(Item.sort_at > since)
+    return query.order_by(Item.sort_at.desc(), Item.id.asc()).limit(limit).all()
+
+
+def record_refresh_error(feed, error):
+    """Remember a failed build; the previous XML keeps being served."""
+    snapshot = feed.snapshot or FeedSnapshot(feed_id=feed.id)
+    snapshot.checked_at = _utcnow()
+    snapshot.last_error = str(error)
+    db.session.add(snapshot)
+    db.session.commit()
+
+
+def record_build(feed_id, timings, items=None):
+    """Feed build metrics; ``items`` is None for a failed build."""
+    metrics.FEED_BUILD_SECONDS.observe(time.perf_counter() - timings.started, feed=feed_id)
+    metrics.FEED_BUILDS.inc(feed=feed_id, result='error' if items is None else 'ok')
+    metrics.FEED_PAGES.inc(timings.pages_fetched, feed=feed_id)
+    if items is not None:
+        metrics.FEED_ITEMS.inc(len(items), feed=feed_id)
+
+
+def refresh_feed(feed_id):
+    """Scrape a feed, update its item store and the rendered XML. Keeps the old XML on failure."""
+    feed = db.session.get(Feed, feed_id)
+    if feed is None:
+        return None
+    with metrics.collect() as timings:
+        try:
+            scraped = extract_items_with_mapping(feed.url, feed.mapping(), limit=app.config['FEED_ITEM_LIMIT'],
+                                                 seen=seen_items(feed))
+        except Exception as e:
+            record_refresh_error(feed, e)
+            record_build(feed.id, timings)
+            raise
+        snapshot = publish_feed(feed, scraped)
+        record_build(feed.id, timings, scraped)
+    return snapshot
+
+
+def publish_feed(feed, scraped):
+    """Store freshly scraped items and re-render the XML if the newest items changed."""
+    snapshot = feed.snapshot or FeedSnapshot(feed_id=feed.id)
+    limit = app.config['FEED_ITEM_LIMIT']
+    now = _utcnow()
+    store_items(feed, scraped)
+    items = [row.as_entry() for row in latest_items(feed, limit)]
+    digest = items_digest(items)
+    # Unchanged items: keep the stored XML and validators, skip serialization
+    if snapshot.xml is None or snapshot.etag != digest:
+        snapshot.xml = render_rss(feed, items)
+        snapshot.xml_gz = compress(snapshot.xml)
+        snapshot.etag = digest
+        snapshot.modified_at = now
+    snapshot.built_at = snapshot.checked_at = now
+    snapshot.last_error = None
+    db.session.add(snapshot)
+    db.session.commit()
+    return snapshot
+
+
+# One build per feed at a time, across threads and worker processes
+feed_flights = SingleFlight(os.path.join(LOCK_DIR, 'feeds'))
+
+
+def _refresh_if_needed(feed_id):
+    # Another process may have rebuilt the feed while we waited for its lock
+    db.session.expire_all()
+    feed = db.session.get(Feed, feed_id)
+    if feed is None:
+        return
+    snapshot = feed.snapshot
+    if snapshot is not None and snapshot.xml is not None and not is_stale(snapshot, refresh_interval_for(feed)):
+        return
+    if failed_recently(snapshot, refresh_interval_for(feed)):
+        return
+    refresh_feed(feed_id)
+
+
+def refresh_feed_once(feed_id):
+    """refresh_feed for concurrent callers: followers wait for the running build instead of scraping again."""
+    feed_flights.do(feed_id, _refresh_if_needed, feed_id)
+    db.session.expire_all()
+
+
+def due_feed_ids():
+    rows = db.session.query(Feed.id, Feed.refresh_interval, FeedSnapshot.checked_at) \
+        .outerjoin(FeedSnapshot, FeedSnapshot.feed_id == Feed.id).all()
+    now = _utcnow()
+    # A row with a bad interval (stored before it was validated) uses the default
+    return [feed_id for feed_id, interval, checked_at in rows
+            if checked_at is None or (now - checked_at).total_seconds() >= _interval_seconds(interval)]
+
+
+refresher = FeedRefresher(
+    app, due_feed_ids, refresh_feed_once,
+    poll_interval=app.config['FEED_REFRESH_POLL'],
+    max_workers=app.config['FEED_REFRESH_WORKERS'],
+)
+
+
+@app.before_request
+def _start_refresher():
+    if app.config['FEED_REFRESH_ENABLED'] and not refresher.running:
+        refresher.start()
 
 # ----------------------------------------------------------------------------
 # Routes - UI Pages
@@ -80,8 +521,8 @@ def init_db():
 
 @app.route('/')
 def index():
-    feeds = Feed.query.all()
-    return render_template('index.html', feeds=feeds)
+    page = feeds_page()
+    return render_template('index.html', feeds=page.items, page=page)
 
 @app.route('/feeds/<int:feed_id>')
 def view_feed(feed_id):
@@ -107,41 +548,110 @@ def picker_page():
 
 @app.route('/api/feeds', methods=['GET'])
 def api_list_feeds():
-    feeds = Feed.query.all()
-    return jsonify([f.as_dict() for f in feeds])
+    """One page of feeds (``?page=``, ``?per_page=``); the total and page links are in headers."""
+    page = feeds_page()
+    response = jsonify([f.as_dict() for f in page.items])
+    response.headers['X-Total-Count'] = str(page.total)
+    links = []
+    if page.has_next:
+        links.append(f'<{url_for("api_list_feeds", page=page.next_num, per_page=page.per_page)}>; rel="next"')
+    if page.has_prev:
+        links.append(f'<{url_for("api_list_feeds", page=page.prev_num, per_page=page.per_page)}>; rel="prev"')
+    if links:
+        response.headers['Link'] = ', '.join(links)
+    return response
 
 @app.route('/api/feeds', methods=['POST'])
 def api_create_feed():
-    data = request.json
-    # Required fields: name, url, item_selector
-    required = ['name', 'url', 'item_selector']
-    if not all(field in data for field in required):
-        return jsonify({'error': 'Missing required fields'}), 400
-
-    feed = Feed(
-        name=data['name'],
-        url=data['url'],
-        item_selector=data['item_selector'],
-        title_selector=data.get('title_selector'),
-        link_selector=data.get('link_selector'),
-        content_selector=data.get('content_selector'),
-        date_selector=data.get('date_selector'),
-        author_selector=data.get('author_selector'),
-        image_selector=data.get('image_selector')
-    )
+    try:
+        feed = new_feed(request.json)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     db.session.add(feed)
     db.session.commit()
     return jsonify(feed.as_dict()), 201
 
+@app.route('/api/feeds/import', methods=['POST'])
+def api_import_feeds():
+    """Create feeds in bulk from JSON (a list of feeds, or an export) or an OPML document.
+
+    All feeds are inserted in one transaction; if any entry is invalid nothing
+    is created. ``?skip_existing=1`` leaves out feeds whose URL is already used.
+    """
+    if request.is_json:
+        data = request.get_json(silent=True)
+        entries = data.get('feeds') if isinstance(data, dict) else data
+        if not isinstance(entries, list):
+            return jsonify({'error': 'Expected a list of feeds'}), 400
+    else:
+        try:
+            entries = read_opml(request.get_data())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    feeds, errors = [], []
+    for index, entry in enumerate(entries):
+        try:
+            feeds.append(new_feed(entry))
+        except ValueError as e:
+            errors.append({'index': index, 'error': str(e)})
+    if errors:
+        return jsonify({'error': 'Invalid feeds, nothing imported', 'errors': errors}), 400
+
+    skipped = 0
+    if request.args.get('skip_existing') == '1':
+        urls = {feed.url for feed in feeds}
+        existing = {url for url, in db.session.query(Feed.url).filter(Feed.url.in_(urls))}
+        kept = []
+        for feed in feeds:
+            if feed.url not in existing:
+                existing.add(feed.url)
+                kept.append(feed)
+        skipped = len(feeds) - len(kept)
+        feeds = kept
+
+    db.session.add_all(feeds)
+    db.session.commit()
+    return jsonify({'created': len(feeds), 'skipped': skipped, 'feeds': [f.as_dict() for f in feeds]}), 201
+
+@app.route('/api/feeds/export', methods=['GET'])
+def api_export_feeds():
+    """All feed definitions as JSON (``?format=json``, importable as-is) or OPML (``?format=opml``)."""
+    fmt = request.args.get('format', 'json')
+    feeds = [f.as_dict() for f in Feed.query.order_by(Feed.id)]
+    if fmt == 'opml':
+        body = write_opml(feeds, lambda f: url_for('feed_rss', feed_id=f['id'], fmt='xml', _external=True))
+        mimetype = 'text/x-opml'
+    elif fmt == 'json':
+        body = json.dumps({'feeds': feeds}, ensure_ascii=False, indent=2)
+        mimetype = 'application/json'
+    else:
+        return jsonify({'error': 'Unknown format'}), 400
+    response = Response(body, mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=site2rss-feeds.{fmt}'
+    return response
+
 @app.route('/api/feeds/<int:feed_id>', methods=['PUT'])
 def api_update_feed(feed_id):
     feed = Feed.query.get_or_404(feed_id)
     data = request.json or {}
-    for field in [
-        'name', 'url', 'item_selector', 'title_selector',
-        'link_selector', 'content_selector', 'date_selector', 'author_selector', 'image_selector']:
-        if field in data:
-            setattr(feed, field, data[field])
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    try:
+        fields = clean_feed_fields(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    # Items scraped from another URL or matched by other item/link selectors no longer belong
+    # to the feed; stored values are compared the way payloads are cleaned ('' == None)
+    rescrape = any(field in fields and fields[field] != _blank_to_none(getattr(feed, field))
+                   for field in ITEM_IDENTITY_FIELDS)
+    for field, value in fields.items():
+        setattr(feed, field, value)
+    if rescrape:
+        Item.query.filter(Item.feed_id == feed.id).delete(synchronize_session=False)
+    # Selectors may have changed, so the stored XML can't be trusted anymore
+    if feed.snapshot is not None:
+        db.session.delete(feed.snapshot)
     db.session.commit()
     return jsonify(feed.as_dict())
 
@@ -173,65 +683,281 @@ def api_preview():
         return jsonify({'error': 'Missing url or mapping'}), 400
     try:
         items = extract_items_with_mapping(url, mapping)
-        return jsonify({'items': items})
+        return jsonify({'items': dates_to_iso(items)})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/preview/batch', methods=['POST'])
+def api_preview_batch():
+    """Preview many ``{url, mapping, limit}`` entries concurrently.
+
+    The response is NDJSON with one line per entry, ``{index, url, items}`` or
+    ``{index, url, error}``, written as each scrape finishes.
+    """
+    try:
+        entries = preview_batch_entries(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    def lines():
+        pool = ThreadPoolExecutor(max_workers=min(app.config['PREVIEW_BATCH_WORKERS'], len(entries)))
+        try:
+            futures = {pool.submit(extract_items_with_mapping, url, mapping, limit): (index, url)
+                       for index, (url, mapping, limit) in enumerate(entries)}
+            for future in as_completed(futures):
+                index, url = futures[future]
+                try:
+                    yield preview_line(index, url, future.result())
+                except Exception as e:
+                    yield preview_line(index, url, error=str(e))
+        finally:
+            # Client went away: don't start the remaining scrapes
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    return Response(lines(), mimetype='application/x-ndjson')
+
 # ----------------------------------------------------------------------------
 # RSS Feed Endpoint
 # ----------------------------------------------------------------------------
 
-@app.route('/feeds/<int:feed_id>.xml')
-def feed_rss(feed_id):
+@app.route('/feeds/<int:feed_id>.<any(xml, atom, json):fmt>')
+def feed_rss(feed_id, fmt='xml'):
+    """Serve the feed as RSS (.xml), Atom (.atom) or JSON Feed (.json).
+
+    Stale snapshots are served while a refresh runs in the background.
+    ``?limit=N`` and ``?since=<date>`` select fewer or only newer items.
+    """
     feed = Feed.query.get_or_404(feed_id)
-    try:
-        mapping = {
-            'item_selector': feed.item_selector,
-            'title_selector': feed.title_selector,
-            'link_selector': feed.link_selector,
-            'content_selector': feed.content_selector,
-            'date_selector': feed.date_selector,
-            'author_selector': feed.author_selector,
-            'image_selector': feed.image_selector,
-        }
-        xml_output = generate_rss(feed, mapping)
-        return Response(xml_output, mimetype='application/rss+xml')
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    limit = request.args.get('limit', type=int)
+    since = request.args.get('since')
+    if since is not None:
+        since = _as_utc(parse_date(since))
+        if since is None:
+            return jsonify({'error': 'Invalid since date'}), 400
+    snapshot = feed.snapshot
+    if failed_recently(snapshot, refresh_interval_for(feed)):
+        return build_error_response(snapshot, refresh_interval_for(feed))
+    if snapshot is None or snapshot.xml is None or snapshot.etag is None:
+        # Never built yet: build synchronously so the first reader gets a feed
+        try:
+            refresh_feed_once(feed.id)
+        except Exception as e:
+            db.session.rollback()
+            if not failed_recently(feed.snapshot, refresh_interval_for(feed)):
+                return jsonify({'error': str(e)}), 500
+        snapshot = feed.snapshot
+        if snapshot is None or snapshot.xml is None:
+            if snapshot is not None and snapshot.last_error is not None:
+                return build_error_response(snapshot, refresh_interval_for(feed))
+            return jsonify({'error': 'Feed could not be built'}), 500
+    elif is_stale(snapshot, refresh_interval_for(feed)):
+        refresher.request_refresh(feed.id)
+    if fmt == 'xml' and limit is None and since is None:
+        return feed_response(snapshot, refresh_interval_for(feed))
+    return feed_variant_response(feed, snapshot, refresh_interval_for(feed), fmt, limit, since)
+
+
+def build_error_response(snapshot, interval):
+    """503 with the last build error, retryable once the scheduler has tried again."""
+    retry = max(int(interval - (_utcnow() - snapshot.checked_at).total_seconds()), 1)
+    response = jsonify({'error': snapshot.last_error})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(retry)
+    return response
+
+
+def _feed_headers(response, snapshot, interval, etag):
+    response.vary.add('Accept-Encoding')
+    response.set_etag(etag)
+    if snapshot.modified_at:
+        response.last_modified = snapshot.modified_at.replace(tzinfo=timezone.utc)
+    age = (_utcnow() - snapshot.built_at).total_seconds() if snapshot.built_at else interval
+    response.cache_control.public = True
+    response.cache_control.max_age = max(0, int(interval - age))
+
+
+def feed_response(snapshot, interval):
+    """Build a conditional response for a stored snapshot (304 when the reader is up to date)."""
+    etag = snapshot.etag
+    body = snapshot.xml
+    gzipped = snapshot.xml_gz is not None and request.accept_encodings['gzip'] > 0
+    if gzipped:
+        etag += '-gz'
+        body = snapshot.xml_gz
+
+    response = Response(body, mimetype='application/rss+xml')
+    if gzipped:
+        response.headers['Content-Encoding'] = 'gzip'
+    _feed_headers(response, snapshot, interval, etag)
+    return response.make_conditional(request)
+
+
+def feed_variant_response(feed, snapshot, interval, fmt, limit, since):
+    """Render another format or a filtered item list from the item store.
+
+    Variants are validated against the snapshot's ETag, so a reader that is
+    up to date gets a 304 before any item is read or serialized.
+    """
+    limit = min(max(limit or app.config['FEED_ITEM_LIMIT'], 1), app.config['ITEM_STORE_LIMIT'])
+    gzipped = request.accept_encodings['gzip'] > 0
+    variant = f"{snapshot.etag}:{fmt}:{limit}:{since.isoformat() if since else ''}:{'gz' if gzipped else ''}"
+    etag = hashlib.sha256(variant.encode('utf-8')).hexdigest()[:32]
+
+    response = Response(mimetype=FORMATS[fmt].mimetype)
+    _feed_headers(response, snapshot, interval, etag)
+    if response.make_conditional(request).status_code != 304:
+        items = [row.as_entry() for row in latest_items(feed, limit, since)]
+        options = {'feed_url': request.base_url} if fmt == 'json' else {}
+        body = render_feed(fmt, feed, items, updated=snapshot.modified_at, **options)
+        if gzipped:
+            body = gzip.compress(body, compresslevel=6, mtime=0)
+            response.headers['Content-Encoding'] = 'gzip'
+        response.set_data(body)
+    return response
 
 # ----------------------------------------------------------------------------
 # Proxy Route for Visual Selector (to bypass CORS)
 # ----------------------------------------------------------------------------
 
+def picker_rewriter(target_url, scripts=None):
+    """Rewriter for a /proxy response; ``scripts`` is the ?scripts= argument ('1' keeps the page's scripts)."""
+    strip = app.config['PROXY_STRIP_SCRIPTS'] if scripts is None else scripts != '1'
+    return PickerRewriter(target_url, strip_scripts=strip, max_chars=app.config['PROXY_MAX_CHARS'])
+
+
+def picker_headers():
+    # Picker sessions reload the same page while fields are selected
+    return {'Cache-Control': f'private, max-age={HTML_CACHE_TTL}'}
+
+
 @app.route('/proxy')
 def proxy():
-    """Fetch external HTML and serve it with relaxed headers so it can be iframed."""
+    """Serve an external page for the picker iframe from the page cache, streamed and rewritten."""
     target_url = request.args.get('url')
     if not target_url:
         abort(400)
 
-    import requests, re
+    chunks = picker_rewriter(target_url, request.args.get('scripts')).rewrite(stream_html(target_url, raise_for_status=False))
     try:
-        resp = requests.get(target_url, timeout=10, headers={
-            'User-Agent': 'Mozilla/5.0 (compatible; Site2RSS-picker/1.0)'
-        })
+        first = next(chunks, '')
     except Exception as e:
         return f'Error fetching url: {e}', 500
 
-    html = resp.text
-
-    # Inject <base> tag to resolve relative URLs so the page looks correct
-    if '<head' in html:
-        base_tag = f"<base href=\"{target_url}\">"
-        html = re.sub(r'<head[^>]*>', lambda m: m.group(0) + base_tag, html, count=1, flags=re.IGNORECASE)
+    def body():
+        yield first
+        yield from chunks
 
     # Always return 200 so iframe can load even if origin sent 403/404
-    response = Response(html, status=200, mimetype='text/html')
-    # Remove framing-breaking headers
-    response.headers.pop('X-Frame-Options', None)
-    response.headers.pop('Content-Security-Policy', None)
+    return Response(body(), status=200, mimetype='text/html', headers=picker_headers())
+
+# ----------------------------------------------------------------------------
+# Metrics
+# ----------------------------------------------------------------------------
+
+metrics.GaugeFunction(
+    'site2rss_memory_cache', 'In-process cache size and hit/miss/eviction counters.',
+    lambda: {(cache.name, stat): value
+             for cache in (PAGE_MEMORY_CACHE, ARTICLE_SELECTOR_CACHE)
+             for stat, value in cache.stats().items()},
+    ('cache', 'stat'))
+
+metrics.GaugeFunction(
+    'site2rss_fetcher', 'Shared HTTP client counters (requests, retries, throttling, connection reuse).',
+    lambda: {(name,): value for name, value in default_fetcher.stats().items()}, ('stat',))
+
+_TIMED_ENDPOINTS = ('feed_rss', 'api_preview')
+
+
+@app.before_request
+def _start_timing():
+    if app.config['SERVER_TIMING'] and request.endpoint in _TIMED_ENDPOINTS:
+        g.timings, g.timings_token = metrics.start_collecting()
+
+
+@app.after_request
+def _server_timing(response):
+    timings = g.get('timings')
+    if timings is not None:
+        response.headers['Server-Timing'] = timings.server_timing()
     return response
 
+
+@app.teardown_request
+def _stop_timing(exc):
+    token = g.pop('timings_token', None)
+    if token is not None:
+        metrics.stop_collecting(token)
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus text format; values are per worker process."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+# ----------------------------------------------------------------------------
+# CLI - batch refresh
+# ----------------------------------------------------------------------------
+
+_STAGES = ('fetch', 'parse', 'enrich', 'publish')
+
+
+@app.cli.command('refresh-feeds')
+@click.option('--feed', 'feed_ids', type=int, multiple=True, help='Only refresh this feed id (repeatable).')
+@click.option('--due', is_flag=True, help='Only refresh feeds whose refresh interval has passed.')
+@click.option('--workers', type=int, default=None, help='Parser processes (default: CPU count).')
+@click.option('--fetchers', type=int, default=8, show_default=True, help='Fetch/enrichment threads.')
+@click.option('--timeout', type=float, default=60.0, show_default=True, help='Per-feed timeout in seconds.')
+def refresh_feeds_command(feed_ids, due, workers, fetchers, timeout):
+    """Refresh many feeds at once and print per-feed timings."""
+    init_db()
+    query = Feed.query.order_by(Feed.id)
+    if feed_ids:
+        query = query.filter(Feed.id.in_(feed_ids))
+    feeds = query.all()
+    if due:
+        due_ids = set(due_feed_ids())
+        feeds = [f for f in feeds if f.id in due_ids]
+    if not feeds:
+        click.echo('No feeds to refresh.')
+        return
+
+    jobs = [RefreshJob(f.id, f.url, f.mapping(), seen_items(f)) for f in feeds]
+    totals = dict.fromkeys(_STAGES, 0.0)
+    failed = 0
+    started = time.perf_counter()
+    click.echo(f"{'feed':>6}  {'status':<7} {'items':>5} " + ' '.join(f'{s:>8}' for s in _STAGES) + '  error')
+    for result in scrape_batch(jobs, app.config['FEED_ITEM_LIMIT'], workers, fetchers, timeout):
+        error = result.error
+        start = time.perf_counter()
+        # Same lock as refresh_feed_once, so a running web refresher can't publish the feed at the same time
+        with feed_flights.file_lock(result.job.feed_id):
+            # Reload: another process may have published the feed since it was read
+            db.session.expire_all()
+            feed = db.session.get(Feed, result.job.feed_id)
+            if error is None:
+                try:
+                    publish_feed(feed, result.items)
+                except Exception as e:
+                    db.session.rollback()
+                    error = str(e)
+            if error is not None:
+                record_refresh_error(feed, error)
+                failed += 1
+        result.timings['publish'] = time.perf_counter() - start
+
+        for stage in _STAGES:
+            totals[stage] += result.timings.get(stage, 0.0)
+        cells = ' '.join(f"{result.timings[s] * 1000:8.0f}" if s in result.timings else f"{'-':>8}"
+                         for s in _STAGES)
+        items = len(result.items) if result.items is not None else 0
+        click.echo(f"{feed.id:>6}  {'ok' if error is None else 'failed':<7} {items:>5} {cells}  {error or ''}")
+
+    elapsed = time.perf_counter() - started
+    click.echo(f"{len(jobs)} feeds, {failed} failed in {elapsed:.1f}s wall; stage totals (ms): "
+               + ', '.join(f'{s} {totals[s] * 1000:.0f}' for s in _STAGES))
+    if failed:
+        raise SystemExit(1)
+
 # ----------------------------------------------------------------------------
 
 if __name__ == '__main__':
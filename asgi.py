@@ -0,0 +1,237 @@
+import asyncio
+import json
+import re
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+
+import metrics
+from app import (app, db, init_db, refresher, feed_flights, Feed, picker_rewriter, picker_headers,
+                 publish_feed, record_refresh_error, record_build, preview_batch_entries, preview_line,
+                 failed_recently, refresh_interval_for)
+from fetcher import default_async_fetcher
+from scraper import auto_detect_async, dates_to_iso, extract_items_async, stream_html_async
+
+# -----------------------------------------------------------------------------
+# ASGI entry point:  uvicorn asgi:application
+# -----------------------------------------------------------------------------
+# Endpoints that wait on origin sites (preview, batch preview, auto detect, the
+# picker proxy and the first build of a feed) run on the event loop, so slow
+# origins do not hold a worker each. Every other request goes to the Flask app unchanged.
+
+_flask = WsgiToAsgi(app)
+
+_FEED_XML = re.compile(r'^/feeds/(\d+)\.(?:xml|atom|json)$')
+
+
+async def _read_json(receive):
+    body = b''
+    more = True
+    while more:
+        message = await receive()
+        body += message.get('body', b'')
+        more = message.get('more_body', False)
+    try:
+        return json.loads(body or b'null') or {}
+    except ValueError:
+        return {}
+
+
+async def _respond(send, status, body, content_type, headers=()):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type.encode('latin-1')),
+                    (b'content-length', str(len(body)).encode('latin-1'))]
+                   + [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _json(send, payload, status=200, headers=()):
+    await _respond(send, status, json.dumps(payload).encode('utf-8'), 'application/json', headers)
+
+
+async def api_auto_detect(scope, receive, send):
+    data = await _read_json(receive)
+    url = data.get('url')
+    if not url:
+        return await _json(send, {'error': 'Missing url'}, 400)
+    try:
+        mapping, preview_items = await auto_detect_async(url)
+        await _json(send, {'mapping': mapping, 'preview': preview_items})
+    except Exception as e:
+        await _json(send, {'error': str(e)}, 500)
+
+
+async def api_preview(scope, receive, send):
+    data = await _read_json(receive)
+    url = data.get('url')
+    mapping = data.get('mapping')
+    if not url or not mapping:
+        return await _json(send, {'error': 'Missing url or mapping'}, 400)
+    with metrics.collect() as timings:
+        try:
+            payload, status = {'items': dates_to_iso(await extract_items_async(url, mapping))}, 200
+        except Exception as e:
+            payload, status = {'error': str(e)}, 500
+    headers = [('Server-Timing', timings.server_timing())] if app.config['SERVER_TIMING'] else []
+    await _json(send, payload, status, headers)
+
+
+async def api_preview_batch(scope, receive, send):
+    """Batch preview with at most PREVIEW_BATCH_WORKERS scrapes in flight; NDJSON lines as they finish."""
+    try:
+        entries = preview_batch_entries(await _read_json(receive))
+    except ValueError as e:
+        return await _json(send, {'error': str(e)}, 400)
+    limiter = asyncio.Semaphore(app.config['PREVIEW_BATCH_WORKERS'])
+
+    async def run(index, url, mapping, limit):
+        async with limiter:
+            try:
+                return preview_line(index, url, await extract_items_async(url, mapping, limit))
+            except Exception as e:
+                return preview_line(index, url, error=str(e))
+
+    tasks = [asyncio.ensure_future(run(index, *entry)) for index, entry in enumerate(entries)]
+    await send({'type': 'http.response.start', 'status': 200,
+                'headers': [(b'content-type', b'application/x-ndjson')]})
+    try:
+        for finished in asyncio.as_completed(tasks):
+            line = await finished
+            await send({'type': 'http.response.body', 'body': line.encode('utf-8'), 'more_body': True})
+    finally:
+        for task in tasks:
+            task.cancel()
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def proxy(scope, receive, send):
+    query = parse_qs(scope['query_string'].decode('latin-1'))
+    target_url = query.get('url', [None])[0]
+    if not target_url:
+        return await _respond(send, 400, b'Bad Request', 'text/plain; charset=utf-8')
+
+    rewriter = picker_rewriter(target_url, query.get('scripts', [None])[0])
+    chunks = rewriter.rewrite_async(stream_html_async(target_url, raise_for_status=False))
+    try:
+        first = await anext(chunks, '')
+    except Exception as e:
+        await chunks.aclose()
+        return await _respond(send, 500, f'Error fetching url: {e}'.encode('utf-8'), 'text/html; charset=utf-8')
+
+    # Always 200 so the iframe loads even if the origin sent 403/404
+    headers = [(b'content-type', b'text/html; charset=utf-8')]
+    headers += [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in picker_headers().items()]
+    await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+    try:
+        await send({'type': 'http.response.body', 'body': first.encode('utf-8'), 'more_body': True})
+        async for chunk in chunks:
+            await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+    finally:
+        await chunks.aclose()
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+def _unbuilt_feed(feed_id):
+    """(url, mapping) of a feed that has no XML yet and should be built now, else None.
+
+    A feed whose build failed recently is left to Flask, which serves the stored error.
+    """
+    with app.app_context():
+        feed = db.session.get(Feed, feed_id)
+        if feed is None or (feed.snapshot and feed.snapshot.xml and feed.snapshot.etag):
+            return None
+        if failed_recently(feed.snapshot, refresh_interval_for(feed)):
+            return None
+        return feed.url, feed.mapping()
+
+
+def _publish(feed_id, items, error=None):
+    with app.app_context():
+        feed = db.session.get(Feed, feed_id)
+        if feed is None:
+            return
+        if error is not None:
+            record_refresh_error(feed, error)
+        else:
+            publish_feed(feed, items)
+
+
+# Builds in progress in this process, so concurrent first readers share one
+_builds = {}
+
+
+async def _build(feed_id):
+    """Build a never-built feed; returns an error message or None."""
+    # Same lock as feed_flights, so builds by other threads and processes are awaited too
+    lock = feed_flights.file_lock(feed_id)
+    if lock is not None:
+        await asyncio.to_thread(lock.acquire)
+    try:
+        unbuilt = await asyncio.to_thread(_unbuilt_feed, feed_id)
+        if unbuilt is None:
+            return None
+        url, mapping = unbuilt
+        with metrics.collect() as timings:
+            try:
+                items = await extract_items_async(url, mapping, limit=app.config['FEED_ITEM_LIMIT'])
+            except Exception as e:
+                await asyncio.to_thread(_publish, feed_id, None, e)
+                record_build(feed_id, timings)
+                return str(e)
+            await asyncio.to_thread(_publish, feed_id, items)
+            record_build(feed_id, timings, items)
+        return None
+    finally:
+        if lock is not None:
+            lock.release()
+
+
+async def feed_rss(scope, receive, send, feed_id):
+    """Build a never-built feed on the event loop, then let Flask serve the stored XML."""
+    if await asyncio.to_thread(_unbuilt_feed, feed_id) is not None:
+        build = _builds.get(feed_id)
+        if build is None:
+            build = _builds[feed_id] = asyncio.ensure_future(_build(feed_id))
+            build.add_done_callback(lambda _: _builds.pop(feed_id, None))
+        # A failed build is recorded on the snapshot; Flask then serves its error
+        await asyncio.shield(build)
+    await _flask(scope, receive, send)
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await asyncio.to_thread(init_db)
+            if app.config['FEED_REFRESH_ENABLED']:
+                refresher.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            refresher.stop(wait=False)
+            await default_async_fetcher.aclose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+_ROUTES = {
+    ('POST', '/api/auto_detect'): api_auto_detect,
+    ('POST', '/api/preview'): api_preview,
+    ('POST', '/api/preview/batch'): api_preview_batch,
+    ('GET', '/proxy'): proxy,
+}
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+    if scope['type'] == 'http':
+        handler = _ROUTES.get((scope['method'], scope['path']))
+        if handler is not None:
+            return await handler(scope, receive, send)
+        match = _FEED_XML.match(scope['path'])
+        if match and scope['method'] in ('GET', 'HEAD'):
+            return await feed_rss(scope, receive, send, int(match.group(1)))
+    await _flask(scope, receive, send)
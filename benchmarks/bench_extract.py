@@ -0,0 +1,119 @@
+"""Per-page listing extraction time: legacy string selectors vs. compiled selector plans.
+
+Run from the repository root:
+
+    python benchmarks/bench_extract.py [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import time
+from urllib.parse import urljoin
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import selector_plan  # noqa: E402
+from scraper import parse_items, parse_date, text_of  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+CASES = {
+    'blog_listing.html': {
+        'item_selector': 'article.post',
+        'title_selector': 'h2.entry-title',
+        'link_selector': 'h2.entry-title a',
+        'content_selector': '.entry-summary',
+        'date_selector': 'time.published',
+        'author_selector': '.author',
+        'image_selector': 'figure img',
+    },
+    'news_listing.html': {
+        'item_selector': 'li.story',
+        'title_selector': 'a.headline',
+        'link_selector': 'a.headline',
+        'content_selector': '.teaser',
+        'date_selector': '.date',
+        'author_selector': '.by',
+        'image_selector': '',
+    },
+}
+
+BASE_URL = 'https://example.com/'
+
+
+def legacy_parse_items(html, base_url, mapping, limit=50):
+    """The extraction loop as it was before selector plans (html.parser, string selectors)."""
+    soup = BeautifulSoup(html, 'html.parser')
+    items = []
+    for item_el in soup.select(mapping.get('item_selector') or 'article'):
+        if len(items) >= limit:
+            break
+        sel = {k: mapping.get(f'{k}_selector') for k in selector_plan.FIELDS}
+        found = {k: item_el.select_one(v) if v else None for k, v in sel.items()}
+        title = text_of(found['title'])
+        link_el = found['link']
+        link = urljoin(base_url, link_el['href']) if link_el and link_el.has_attr('href') else None
+        if not title or not link:
+            continue
+        image_el = found['image']
+        image = urljoin(base_url, image_el['src']) if image_el is not None and image_el.has_attr('src') else None
+        items.append({
+            'title': title, 'link': link, 'content': text_of(found['content']),
+            'date': parse_date(text_of(found['date'])), 'author': text_of(found['author']), 'image': image,
+        })
+    return items
+
+
+def plan_parse_items(parser, strain):
+    def run(html, base_url, mapping, limit=50):
+        strainer = selector_plan._strainer_for(mapping['item_selector']) if strain else None
+        saved = selector_plan.SelectorPlan.parse_listing
+        selector_plan.SelectorPlan.parse_listing = lambda self, h: BeautifulSoup(h, parser, parse_only=strainer)
+        try:
+            return parse_items(html, base_url, mapping, limit)
+        finally:
+            selector_plan.SelectorPlan.parse_listing = saved
+    return run
+
+
+# The plans SelectorPlan uses: lxml without a strainer, html.parser (no lxml) with one
+VARIANTS = [
+    ('legacy (html.parser, string selectors)', legacy_parse_items),
+    ('plan (html.parser, compiled)', plan_parse_items('html.parser', strain=False)),
+    ('plan (html.parser, compiled, strainer)', plan_parse_items('html.parser', strain=True)),
+    ('plan (lxml, compiled)', plan_parse_items('lxml', strain=False)),
+]
+
+
+def bench(fn, html, mapping, repeat):
+    fn(html, BASE_URL, mapping)  # warm-up (selector compilation, imports)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = fn(html, BASE_URL, mapping)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2], len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    for fixture, mapping in CASES.items():
+        with open(os.path.join(FIXTURES, fixture), encoding='utf-8') as fh:
+            html = fh.read()
+        print(f"\n{fixture} ({len(html) / 1024:.0f} KB), median of {args.repeat} runs")
+        baseline = None
+        for name, fn in VARIANTS:
+            median, count = bench(fn, html, mapping, args.repeat)
+            baseline = baseline or median
+            print(f"  {name:<42} {median * 1000:8.2f} ms  {count:3d} items  x{baseline / median:.2f}")
+
+
+if __name__ == '__main__':
+    main()
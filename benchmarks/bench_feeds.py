@@ -0,0 +1,123 @@
+"""Feed serialization time: the previous feedgen RSS path vs. the streaming writers.
+
+Items come from the blog fixture and are shaped like item store entries
+(datetime dates, a guid per item). Each variant renders the same item list.
+
+Run from the repository root:
+
+    python benchmarks/bench_feeds.py [--repeat 50]
+"""
+import argparse
+import mimetypes
+import os
+import sys
+import time
+from datetime import timezone
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from dateutil import parser as dateparser  # noqa: E402
+from feedgen.feed import FeedGenerator  # noqa: E402
+
+import feed_writer  # noqa: E402
+from scraper import parse_items  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+BASE_URL = 'https://blog.example.com/'
+MAPPING = {
+    'item_selector': 'article.post',
+    'title_selector': 'h2.entry-title',
+    'link_selector': 'h2.entry-title a',
+    'content_selector': '.entry-summary',
+    'date_selector': 'time.published',
+    'author_selector': '.author',
+    'image_selector': 'figure img',
+}
+
+
+def feedgen_rss(feed_model, items, pretty=True):
+    """render_rss as it was before the streaming writers."""
+    fg = FeedGenerator()
+    fg.id(str(feed_model.id))
+    fg.title(feed_model.name or feed_model.url)
+    fg.link(href=feed_model.url, rel='alternate')
+    fg.description(f"RSS feed generated from {feed_model.url}")
+
+    for itm in items:
+        fe = fg.add_entry(order='append')
+        fe.title(itm['title'])
+        fe.link(href=itm['link'])
+        if itm.get('guid'):
+            fe.guid(itm['guid'], permalink=itm['guid'] == itm['link'])
+        if itm.get('date'):
+            try:
+                dt = dateparser.parse(itm['date']) if isinstance(itm['date'], str) else itm['date']
+                if dt and dt.tzinfo is None:
+                    dt = dt.replace(tzinfo=timezone.utc)
+                fe.pubDate(dt)
+            except Exception:
+                pass
+        if itm.get('author'):
+            fe.author({'name': itm['author']})
+        if itm.get('content'):
+            fe.description(itm['content'])
+        if itm.get('image'):
+            mime = mimetypes.guess_type(itm['image'])[0] or 'image/jpeg'
+            fe.enclosure(itm['image'], 0, mime)
+
+    return fg.rss_str(pretty=pretty)
+
+
+VARIANTS = [
+    ('feedgen RSS (pretty, previous default)', lambda feed, items: feedgen_rss(feed, items)),
+    ('feedgen RSS (compact)', lambda feed, items: feedgen_rss(feed, items, pretty=False)),
+    ('writer RSS', lambda feed, items: feed_writer.render('xml', feed, items)),
+    ('writer RSS (pretty)', lambda feed, items: feed_writer.render('xml', feed, items, pretty=True)),
+    ('writer Atom', lambda feed, items: feed_writer.render('atom', feed, items)),
+    ('writer JSON Feed', lambda feed, items: feed_writer.render('json', feed, items)),
+]
+
+
+def store_entries(count):
+    """``count`` item-store-like entries built from the blog fixture."""
+    with open(os.path.join(FIXTURES, 'blog_listing.html'), encoding='utf-8') as fh:
+        scraped = parse_items(fh.read(), BASE_URL, MAPPING, limit=count)
+    entries = []
+    while len(entries) < count:
+        for itm in scraped[:count - len(entries)]:
+            link = f"{itm['link']}?n={len(entries)}"
+            entries.append(dict(itm, link=link, guid=link))
+    return entries
+
+
+def bench(fn, feed, items, repeat):
+    fn(feed, items)  # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn(feed, items)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2], len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    feed = SimpleNamespace(id=1, name='Benchmark blog', url=BASE_URL)
+    for count in (50, 200):
+        items = store_entries(count)
+        print(f"\n{count} items, median of {args.repeat} runs")
+        baseline = None
+        for name, fn in VARIANTS:
+            median, size = bench(fn, feed, items, args.repeat)
+            baseline = baseline or median
+            print(f"  {name:<40} {median * 1000:8.2f} ms  {size / 1024:6.1f} KiB  x{baseline / median:.2f}")
+
+
+if __name__ == '__main__':
+    main()
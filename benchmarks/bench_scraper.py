@@ -0,0 +1,322 @@
+"""Per-stage scraper timings on the fixture corpus, with an optional regression check.
+
+Pages are served by a local stub HTTP server, so the suite runs offline. For
+each listing (small, medium, news and a generated multi-MB page) it reports
+the fastest of --repeat timings of every stage: fetch, parse, select, date parsing,
+article enrichment, RSS serialization, local selector detection and the
+fallback candidate search, plus the whole extract+render path and its peak
+traced memory.
+
+Run from the repository root:
+
+    python benchmarks/bench_scraper.py [--repeat 15] [--json results.json]
+    python benchmarks/bench_scraper.py --baseline results.json [--tolerance 0.5]
+
+With --baseline the exit status is 1 when a stage got slower than the
+baseline by more than the tolerance (and by more than --min-ms). The minimum
+is used because scheduling noise only ever adds time; --json also records
+the tolerance and --min-ms, which a later --baseline run reuses unless they
+are given again.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Cold, private caches: every fetch reaches the stub server
+_TMP = tempfile.mkdtemp(prefix='site2rss-bench-')
+os.environ['HTML_CACHE_TTL'] = '0'
+os.environ['HTTP_CACHE_PATH'] = os.path.join(_TMP, 'http_cache.db')
+os.environ['DETECTION_CACHE_PATH'] = os.path.join(_TMP, 'detection_cache.db')
+os.environ['LOCK_DIR'] = os.path.join(_TMP, 'locks')
+os.environ.setdefault('FETCH_HOST_RATE', '100000')
+os.environ.setdefault('FETCH_HOST_BURST', '100000')
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import scraper  # noqa: E402
+from heuristics import detect_mapping  # noqa: E402
+from rss_utils import render_rss  # noqa: E402
+from selector_plan import plan_for  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+BLOG = {
+    'item_selector': 'article.post',
+    'title_selector': 'h2.entry-title',
+    'link_selector': 'h2.entry-title a',
+    'content_selector': '.entry-summary',
+    'date_selector': 'time.published',
+    'author_selector': '.author',
+    'image_selector': 'figure img',
+}
+NEWS = {
+    'item_selector': 'li.story',
+    'title_selector': 'a.headline',
+    'link_selector': 'a.headline',
+    'content_selector': '.teaser',
+    'date_selector': '.date',
+    'author_selector': '.by',
+    'image_selector': '',
+}
+# Listing mapping without date/author/image, so every item is enriched from article.html
+BLOG_ENRICH = dict(BLOG, date_selector='', author_selector='', image_selector='')
+ARTICLE = {
+    'date_selector': 'time.published',
+    'author_selector': '.author',
+    'content_selector': '.entry-content',
+    'image_selector': 'meta[property="og:image"]',
+}
+
+LIMIT = 50
+STAGES = ('fetch', 'parse', 'select', 'dates', 'enrich', 'serialize', 'detect', 'candidate', 'pipeline')
+
+
+def _read(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as fh:
+        return fh.read()
+
+
+def _large_listing(copies=20):
+    """news_listing.html with its stories repeated, a few MB."""
+    html = _read('news_listing.html')
+    start = html.index('<li class="story">')
+    end = html.rindex('</li>') + len('</li>\n')
+    return html[:start] + html[start:end] * copies + html[end:]
+
+
+# (case, page path, mapping, enrichment mapping or None)
+CASES = [
+    ('small', '/small_listing.html', BLOG, BLOG_ENRICH),
+    ('medium', '/blog_listing.html', BLOG, BLOG_ENRICH),
+    ('news', '/news_listing.html', NEWS, None),
+    ('large', '/large_listing.html', NEWS, None),
+]
+
+
+# -----------------------------------------------------------------------------
+# Stub origin
+# -----------------------------------------------------------------------------
+
+def start_stub_server():
+    pages = {f'/{name}': _read(name).encode('utf-8')
+             for name in ('small_listing.html', 'blog_listing.html', 'news_listing.html')}
+    pages['/large_listing.html'] = _large_listing().encode('utf-8')
+    article = _read('article.html').encode('utf-8')
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            # Any other path is an article page
+            body = pages.get(self.path.split('?')[0], article)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+
+        def handle_error(self, request, client_address):
+            pass  # streamed reads stop early and close the connection
+
+    server = Server(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, pages
+
+
+# -----------------------------------------------------------------------------
+# Stages
+# -----------------------------------------------------------------------------
+
+class _DateTimer:
+    """Wraps scraper.parse_date to accumulate the time spent in it."""
+
+    def __init__(self):
+        self.original = scraper.parse_date
+        self.seconds = 0.0
+
+    def __call__(self, text, key=''):
+        start = time.perf_counter()
+        try:
+            return self.original(text, key)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+def run_case(url, html, mapping, enrich_mapping):
+    """One timing of every stage, in seconds."""
+    t = {}
+    start = time.perf_counter()
+    scraper.fetch_html(url, use_cache=False)
+    t['fetch'] = time.perf_counter() - start
+
+    plan = plan_for(mapping)
+    start = time.perf_counter()
+    soup = plan.parse_listing(html)
+    t['parse'] = time.perf_counter() - start
+
+    timer = _DateTimer()
+    scraper.parse_date = timer
+    try:
+        start = time.perf_counter()
+        items = scraper._items_from(plan, plan.items(soup), url, LIMIT)
+        elapsed = time.perf_counter() - start
+    finally:
+        scraper.parse_date = timer.original
+    t['dates'] = timer.seconds
+    t['select'] = elapsed - timer.seconds
+
+    if enrich_mapping is not None:
+        pending = scraper.parse_items(html, url, enrich_mapping, LIMIT)
+        start = time.perf_counter()
+        scraper.enrich_items(pending)
+        t['enrich'] = time.perf_counter() - start
+
+    feed = SimpleNamespace(id=1, name='Benchmark', url=url)
+    start = time.perf_counter()
+    render_rss(feed, items)
+    t['serialize'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    detect_mapping(html)
+    t['detect'] = time.perf_counter() - start
+
+    fallback_soup = BeautifulSoup(html, 'html.parser')
+    start = time.perf_counter()
+    scraper.find_candidate_item_selector(fallback_soup)
+    t['candidate'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _pipeline(url, enrich_mapping or mapping, feed)
+    t['pipeline'] = time.perf_counter() - start
+    return t
+
+
+def _pipeline(url, mapping, feed):
+    return render_rss(feed, scraper.extract_items_with_mapping(url, mapping, limit=LIMIT))
+
+
+def peak_memory(url, mapping, feed):
+    tracemalloc.start()
+    try:
+        _pipeline(url, mapping, feed)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# -----------------------------------------------------------------------------
+# Report
+# -----------------------------------------------------------------------------
+
+def run(repeat):
+    server, pages = start_stub_server()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    # Article selectors are known for the stub host, so enrichment never asks the LLM
+    scraper._gemini_client = None
+    scraper.ARTICLE_SELECTOR_CACHE.set(scraper._host(base + '/'), ARTICLE)
+
+    results = {}
+    try:
+        for case, path, mapping, enrich_mapping in CASES:
+            url = base + path
+            html = pages[path].decode('utf-8')
+            run_case(url, html, mapping, enrich_mapping)  # warm-up
+            runs = [run_case(url, html, mapping, enrich_mapping) for _ in range(repeat)]
+            row = {stage: min(r[stage] for r in runs) * 1000 for stage in STAGES if stage in runs[0]}
+            feed = SimpleNamespace(id=1, name='Benchmark', url=url)
+            row['peak_kib'] = peak_memory(url, enrich_mapping or mapping, feed) / 1024
+            row['page_kib'] = len(pages[path]) / 1024
+            results[case] = row
+    finally:
+        server.shutdown()
+    return results
+
+
+def print_report(results, baseline=None):
+    header = f"{'case':<8} {'KiB':>7}" + ''.join(f' {s:>9}' for s in STAGES) + f" {'peak KiB':>9}"
+    print('min ms per stage' + (' (xN = time / baseline)' if baseline else ''))
+    print(header)
+    for case, row in results.items():
+        cells = []
+        for stage in STAGES:
+            if stage not in row:
+                cells.append(f" {'-':>9}")
+                continue
+            cell = f'{row[stage]:.1f}'
+            old = (baseline or {}).get(case, {}).get(stage)
+            if old:
+                cell += f' x{row[stage] / old:.1f}'
+            cells.append(f' {cell:>9}')
+        print(f"{case:<8} {row['page_kib']:7.0f}" + ''.join(cells) + f" {row['peak_kib']:9.0f}")
+
+
+def regressions(results, baseline, tolerance, min_ms):
+    found = []
+    for case, row in results.items():
+        for stage in STAGES:
+            old = baseline.get(case, {}).get(stage)
+            new = row.get(stage)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + tolerance) and new - old > min_ms:
+                found.append(f'{case}/{stage}: {old:.1f} -> {new:.1f} ms')
+    return found
+
+
+TOLERANCE = 0.5
+MIN_MS = 5.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=15)
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--baseline', help='compare with results written by an earlier --json run')
+    parser.add_argument('--tolerance', type=float,
+                        help=f'allowed slowdown per stage (default: the baseline\'s, else {TOLERANCE:g} = 50%%)')
+    parser.add_argument('--min-ms', type=float,
+                        help=f'ignore slowdowns smaller than this (default: the baseline\'s, else {MIN_MS:g})')
+    args = parser.parse_args()
+
+    baseline, settings = None, {}
+    if args.baseline:
+        with open(args.baseline) as fh:
+            saved = json.load(fh)
+        # Files from before the settings were recorded hold only the results
+        baseline, settings = (saved['results'], saved['settings']) if 'results' in saved else (saved, {})
+    tolerance = args.tolerance if args.tolerance is not None else settings.get('tolerance', TOLERANCE)
+    min_ms = args.min_ms if args.min_ms is not None else settings.get('min_ms', MIN_MS)
+
+    results = run(args.repeat)
+    print_report(results, baseline)
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump({'settings': {'statistic': 'min', 'repeat': args.repeat,
+                                    'tolerance': tolerance, 'min_ms': min_ms},
+                       'results': results}, fh, indent=2)
+    if baseline:
+        found = regressions(results, baseline, tolerance, min_ms)
+        for line in found:
+            print('REGRESSION', line)
+        sys.exit(1 if found else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""Worker startup time and concurrent SQLite reads while a feed is being written.
+
+Startup: each variant runs in a fresh interpreter (as a newly booted worker
+does) with a placeholder GEMINI_API_KEY, so the previous eager path imports
+google-genai and creates the client the way importing scraper.py used to.
+init_db is timed on an already up-to-date database, against the previous
+create_all + try/except ALTER TABLE loop.
+
+Concurrent reads: --readers processes page through feeds and read the
+newest items of a feed for --seconds while one writer process keeps
+upserting items into the same feed, once with WAL and once with the
+rollback journal (SQLITE_JOURNAL_MODE=DELETE).
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py [--repeat 5] [--readers 4] [--seconds 5]
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Timed snippets; each prints its duration in seconds
+IMPORT_LAZY = "import time; t = time.perf_counter(); import app; print(time.perf_counter() - t)"
+IMPORT_EAGER = ("import time; t = time.perf_counter(); import app, scraper; scraper.gemini_client(); "
+                "print(time.perf_counter() - t)")
+INIT_DB = "import time, app; app.init_db(); t = time.perf_counter(); app.init_db(); print(time.perf_counter() - t)"
+INIT_DB_PREVIOUS = """
+import time, app
+app.init_db()
+t = time.perf_counter()
+with app.app.app_context():
+    app.db.create_all()
+    for ddl in ("ALTER TABLE feeds ADD COLUMN image_selector VARCHAR(512)",
+                "ALTER TABLE feeds ADD COLUMN refresh_interval INTEGER",
+                "ALTER TABLE feed_snapshots ADD COLUMN xml_gz BLOB",
+                "ALTER TABLE feed_snapshots ADD COLUMN etag VARCHAR(64)",
+                "ALTER TABLE feed_snapshots ADD COLUMN modified_at DATETIME",
+                "ALTER TABLE feeds ADD COLUMN next_page_selector VARCHAR(512)"):
+        try:
+            with app.db.engine.begin() as conn:
+                conn.exec_driver_sql(ddl)
+        except Exception:
+            pass
+print(time.perf_counter() - t)
+"""
+
+STARTUP_VARIANTS = [
+    ('import app (previous: eager genai client)', IMPORT_EAGER),
+    ('import app (lazy genai client)', IMPORT_LAZY),
+    ('init_db (previous: create_all + ALTERs)', INIT_DB_PREVIOUS),
+    ('init_db (versioned migrations)', INIT_DB),
+]
+
+FEEDS = 500
+ITEMS_PER_WRITE = 20
+
+
+def _env(db_file, journal_mode='WAL'):
+    return dict(os.environ, DATABASE_URL=f'sqlite:///{db_file}', SQLITE_JOURNAL_MODE=journal_mode,
+                FEED_REFRESH_ENABLED='0', GEMINI_API_KEY='placeholder', PYTHONPATH=ROOT)
+
+
+def time_snippet(code, env, repeat):
+    timings = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', code], env=env, cwd=ROOT, check=True,
+                             capture_output=True, text=True).stdout
+        timings.append(float(out.strip().splitlines()[-1]))
+    return statistics.median(timings)
+
+
+def _setup(db_file, journal_mode):
+    os.environ.update(_env(db_file, journal_mode))
+    import app
+    app.init_db()
+    with app.app.app_context():
+        app.db.session.add_all(app.Feed(name=f'Feed {i}', url=f'https://example.com/{i}/', item_selector='article')
+                               for i in range(FEEDS))
+        app.db.session.commit()
+
+
+def _reader(db_file, journal_mode, seconds, start, results):
+    os.environ.update(_env(db_file, journal_mode))
+    import app
+    latencies, errors = [], 0
+    start.wait()
+    deadline = time.perf_counter() + seconds
+    with app.app.app_context():
+        feed = app.db.session.get(app.Feed, 1)
+        page = 0
+        while time.perf_counter() < deadline:
+            t = time.perf_counter()
+            try:
+                app.Feed.query.order_by(app.Feed.id).offset(page * 50).limit(50).all()
+                app.latest_items(feed, 50)
+                latencies.append(time.perf_counter() - t)
+            except Exception:
+                errors += 1
+            app.db.session.rollback()
+            page = (page + 1) % (FEEDS // 50)
+    results.put(('reader', latencies, errors))
+
+
+def _writer(db_file, journal_mode, seconds, start, results):
+    os.environ.update(_env(db_file, journal_mode))
+    import app
+    latencies, errors, n = [], 0, 0
+    start.wait()
+    deadline = time.perf_counter() + seconds
+    with app.app.app_context():
+        feed = app.db.session.get(app.Feed, 1)
+        while time.perf_counter() < deadline:
+            t = time.perf_counter()
+            items = [{'title': f'Item {n + i}', 'link': f'https://example.com/1/{n + i}', 'content': 'x' * 500}
+                     for i in range(ITEMS_PER_WRITE)]
+            n += ITEMS_PER_WRITE
+            try:
+                app.store_items(feed, items)
+                app.db.session.commit()
+                latencies.append(time.perf_counter() - t)
+            except Exception:
+                app.db.session.rollback()
+                errors += 1
+    results.put(('writer', latencies, errors))
+
+
+def concurrent_reads(journal_mode, readers, seconds):
+    ctx = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, 'bench.db')
+        setup = ctx.Process(target=_setup, args=(db_file, journal_mode))
+        setup.start()
+        setup.join()
+        start, results = ctx.Event(), ctx.Queue()
+        procs = [ctx.Process(target=_reader, args=(db_file, journal_mode, seconds, start, results))
+                 for _ in range(readers)]
+        procs.append(ctx.Process(target=_writer, args=(db_file, journal_mode, seconds, start, results)))
+        for proc in procs:
+            proc.start()
+        time.sleep(3)  # let the workers import the app
+        start.set()
+        collected = [results.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+
+    summary = {}
+    for role in ('reader', 'writer'):
+        latencies = sorted(l for r, lats, _ in collected if r == role for l in lats)
+        errors = sum(e for r, _, e in collected if r == role)
+        p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0.0
+        summary[role] = (len(latencies) / seconds, statistics.median(latencies) if latencies else 0.0, p99, errors)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"Startup, median of {args.repeat} fresh interpreters")
+    with tempfile.TemporaryDirectory() as tmp:
+        env = _env(os.path.join(tmp, 'bench.db'))
+        for name, code in STARTUP_VARIANTS:
+            print(f"  {name:<44} {time_snippet(code, env, args.repeat) * 1000:8.1f} ms")
+
+    print(f"\n{args.readers} reader processes + 1 writer for {args.seconds:g}s")
+    for mode in ('DELETE', 'WAL'):
+        summary = concurrent_reads(mode, args.readers, args.seconds)
+        for role, (rate, median, p99, errors) in summary.items():
+            print(f"  {mode:<7} {role:<7} {rate:8.1f} ops/s  median {median * 1000:7.2f} ms  "
+                  f"p99 {p99 * 1000:8.2f} ms  errors {errors}")
+
+
+if __name__ == '__main__':
+    main()
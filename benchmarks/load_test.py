@@ -0,0 +1,220 @@
+"""Throughput of the origin-bound endpoints when origin sites are slow: WSGI worker pool vs. ASGI.
+
+A stub origin answers every request after --delay seconds (a small page for
+/proxy, the blog listing fixture for /api/preview). The app is served
+once by a WSGI server with a fixed pool of --workers threads (the way sync
+gunicorn workers behave) and once by uvicorn (asgi.py), and each endpoint
+gets --requests requests with --concurrency in flight.
+
+Run from the repository root:
+
+    python benchmarks/load_test.py [--delay 1] [--concurrency 200] [--requests 1000] [--workers 8]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'blog_listing.html')
+
+MAPPING = {
+    'item_selector': 'article.post',
+    'title_selector': 'h2.entry-title',
+    'link_selector': 'h2.entry-title a',
+    'content_selector': '.entry-summary',
+    'date_selector': 'time.published',
+    'author_selector': '.author',
+    'image_selector': 'figure img',
+}
+
+ORIGIN_PORT, WSGI_PORT, ASGI_PORT = 8901, 8902, 8903
+
+
+# -----------------------------------------------------------------------------
+# Servers (each runs in its own process)
+# -----------------------------------------------------------------------------
+
+def serve_origin(port, delay):
+    with open(FIXTURE, 'rb') as f:
+        listing = f.read()
+    small = b'<html><head><title>t</title></head><body>' + b'<p>hello</p>' * 200 + b'</body></html>'
+
+    def response(body):
+        return (b'HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n'
+                b'Content-Length: ' + str(len(body)).encode() + b'\r\nConnection: close\r\n\r\n' + body)
+
+    pages = {b'/listing': response(listing), b'/small': response(small)}
+
+    async def handle(reader, writer):
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError:  # port probe
+            writer.close()
+            return
+        path = head.split(b' ', 2)[1].split(b'?')[0]
+        await asyncio.sleep(delay)
+        writer.write(pages.get(path, pages[b'/small']))
+        await writer.drain()
+        writer.close()
+
+    async def main():
+        server = await asyncio.start_server(handle, '127.0.0.1', port, backlog=4096)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
+
+
+def serve_wsgi(port, workers):
+    from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+    from app import app
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    class PooledWSGIServer(BaseWSGIServer):
+        """Handles at most ``workers`` requests at a time, like a sync worker pool."""
+
+        pool = ThreadPoolExecutor(max_workers=workers)
+
+        def process_request(self, request, client_address):
+            self.pool.submit(self._handle, request, client_address)
+
+        def _handle(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    PooledWSGIServer('127.0.0.1', port, app, handler=QuietHandler).serve_forever()
+
+
+def serve_asgi(port):
+    import uvicorn
+    uvicorn.run('asgi:application', host='127.0.0.1', port=port, log_level='warning', backlog=4096)
+
+
+# -----------------------------------------------------------------------------
+# Load generator
+# -----------------------------------------------------------------------------
+
+async def _load(make_request, total, concurrency):
+    import httpx
+
+    slots = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def one(client, i):
+        nonlocal failures
+        async with slots:
+            start = time.perf_counter()
+            try:
+                resp = await make_request(client, i)
+                ok = resp.status_code == 200
+            except Exception:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                failures += 1
+
+    # New connection per request: httpcore's pool gets slow with hundreds of idle keep-alive connections
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=0)
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client, i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+    return elapsed, latencies, failures
+
+
+def _endpoints(base):
+    origin = f'http://127.0.0.1:{ORIGIN_PORT}'
+
+    def proxy(client, i):
+        return client.get(f'{base}/proxy', params={'url': f'{origin}/small?p={i}'})
+
+    def preview(client, i):
+        return client.post(f'{base}/api/preview', json={'url': f'{origin}/listing?q={i}', 'mapping': MAPPING})
+
+    return {'proxy': proxy, 'preview': preview}
+
+
+def _wait_for_port(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'nothing listening on port {port}')
+
+
+def _spawn(args, env):
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__)] + [str(a) for a in args],
+                            cwd=ROOT, env=env)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--delay', type=float, default=1.0, help='origin response delay in seconds')
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=8, help='WSGI worker threads')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='site2rss-load-')
+    env = dict(os.environ,
+               HTML_CACHE_TTL='0', FEED_REFRESH_ENABLED='0',
+               FETCH_HOST_RATE='1000000', FETCH_HOST_BURST='1000000', FETCH_POOL_SIZE=str(args.workers),
+               HTTP_CACHE_PATH=os.path.join(tmp, 'http_cache.db'),
+               DETECTION_CACHE_PATH=os.path.join(tmp, 'detection_cache.db'))
+    env.pop('GEMINI_API_KEY', None)
+
+    print(f"origin delay {args.delay:g}s, {args.requests} requests, concurrency {args.concurrency}, "
+          f"{args.workers} WSGI workers")
+    print(f"{'server':<6} {'endpoint':<8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'failed':>7}")
+    procs = [_spawn(['origin', ORIGIN_PORT, args.delay], env)]
+    try:
+        _wait_for_port(ORIGIN_PORT)
+        for name, port, server_args in (('wsgi', WSGI_PORT, ['wsgi', WSGI_PORT, args.workers]),
+                                        ('asgi', ASGI_PORT, ['asgi', ASGI_PORT])):
+            server = _spawn(server_args, env)
+            procs.append(server)
+            _wait_for_port(port)
+            for endpoint, make_request in _endpoints(f'http://127.0.0.1:{port}').items():
+                elapsed, latencies, failures = asyncio.run(_load(make_request, args.requests, args.concurrency))
+                latencies.sort()
+                p50 = statistics.median(latencies) * 1000 if latencies else 0
+                p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0
+                print(f"{name:<6} {endpoint:<8} {len(latencies) / elapsed:8.1f} {p50:8.0f} {p95:8.0f} {failures:7d}")
+            server.terminate()
+            server.wait()
+    finally:
+        for proc in procs:
+            proc.terminate()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] in ('origin', 'wsgi', 'asgi'):
+        mode, port = sys.argv[1], int(sys.argv[2])
+        if mode == 'origin':
+            serve_origin(port, float(sys.argv[3]))
+        elif mode == 'wsgi':
+            serve_wsgi(port, int(sys.argv[3]))
+        else:
+            serve_asgi(port)
+    else:
+        main()
@@ -0,0 +1,136 @@
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import List, Optional
+
+from dateutil import parser as dateparser
+
+# -----------------------------------------------------------------------------
+# Date normalization: exact parsers first, fuzzy dateutil only on a miss
+# -----------------------------------------------------------------------------
+
+# Layouts seen on listing pages, tried in order until one matches a site's dates.
+# Numeric dates are month first, like dateutil's default.
+CANDIDATE_FORMATS = (
+    '%B %d, %Y', '%b %d, %Y', '%B %d %Y', '%b %d %Y', '%b. %d, %Y',
+    '%d %B %Y', '%d %b %Y', '%d. %B %Y',
+    '%A, %B %d, %Y', '%a, %b %d, %Y', '%A, %d %B %Y', '%a, %d %b %Y',
+    '%B %d, %Y %I:%M %p', '%b %d, %Y %I:%M %p', '%B %d, %Y at %I:%M %p', '%d %B %Y %H:%M', '%d %b %Y %H:%M',
+    '%Y-%m-%d %H:%M', '%Y-%m-%d %H:%M:%S', '%Y/%m/%d', '%Y/%m/%d %H:%M', '%Y.%m.%d',
+    '%m/%d/%Y', '%m/%d/%Y %H:%M', '%m/%d/%y', '%d.%m.%Y', '%d.%m.%Y %H:%M', '%m-%d-%Y',
+)
+
+# Formats remembered per key (a host), most recently successful first
+_LEARNED_PER_KEY = 4
+_MAX_KEYS = 4096
+# Keys whose dates never matched a candidate stop scanning after this many misses
+_MAX_SCANS = 3
+
+_ORDINAL = re.compile(r'(?<=\d)(?:st|nd|rd|th)\b', re.IGNORECASE)
+_SPACES = re.compile(r'\s+')
+
+
+class _Learned:
+    __slots__ = ('formats', 'misses')
+
+    def __init__(self):
+        self.formats: List[str] = []
+        self.misses = 0
+
+
+class DateParser:
+    """Parse scraped date strings, learning each site's ``strptime`` layout.
+
+    ISO-8601 and RFC-822 strings go through the standard library parsers.
+    Anything else is tried against the formats that worked before for the
+    same key, then against ``CANDIDATE_FORMATS`` (remembering the winner);
+    fuzzy ``dateutil`` parsing is the last resort.
+    """
+
+    def __init__(self, max_keys: int = _MAX_KEYS):
+        self.max_keys = max_keys
+        self._learned: 'OrderedDict[str, _Learned]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def parse(self, text: Optional[str], key: str = '') -> Optional[datetime]:
+        if not text:
+            return None
+        text = _SPACES.sub(' ', text).strip()
+        if not text:
+            return None
+
+        if text[0].isdigit():
+            try:
+                return datetime.fromisoformat(text)
+            except ValueError:
+                pass
+        if ':' in text:
+            # RFC-822 always has a time of day
+            try:
+                return parsedate_to_datetime(text)
+            except (TypeError, ValueError, IndexError):
+                pass
+
+        learned = self._entry(key)
+        plain = _ORDINAL.sub('', text)
+        for fmt in list(learned.formats):
+            try:
+                value = datetime.strptime(plain, fmt)
+            except ValueError:
+                continue
+            self._promote(learned, fmt)
+            return value
+
+        if learned.misses < _MAX_SCANS:
+            for fmt in CANDIDATE_FORMATS:
+                if fmt in learned.formats:
+                    continue
+                try:
+                    value = datetime.strptime(plain, fmt)
+                except ValueError:
+                    continue
+                self._promote(learned, fmt)
+                learned.misses = 0
+                return value
+            learned.misses += 1
+
+        try:
+            return dateparser.parse(text, fuzzy=True)
+        except (ValueError, OverflowError):
+            return None
+
+    def formats(self, key: str = '') -> List[str]:
+        """Formats learned for ``key``, most recently used first."""
+        with self._lock:
+            learned = self._learned.get(key)
+            return list(learned.formats) if learned else []
+
+    def _entry(self, key: str) -> _Learned:
+        with self._lock:
+            learned = self._learned.get(key)
+            if learned is None:
+                learned = self._learned[key] = _Learned()
+                if len(self._learned) > self.max_keys:
+                    self._learned.popitem(last=False)
+            else:
+                self._learned.move_to_end(key)
+            return learned
+
+    def _promote(self, learned: _Learned, fmt: str) -> None:
+        with self._lock:
+            if learned.formats and learned.formats[0] == fmt:
+                return
+            if fmt in learned.formats:
+                learned.formats.remove(fmt)
+            learned.formats.insert(0, fmt)
+            del learned.formats[_LEARNED_PER_KEY:]
+
+
+default_date_parser = DateParser()
+
+
+def parse_date(text: Optional[str], key: str = '') -> Optional[datetime]:
+    """Parse a scraped date with the shared parser; ``key`` scopes learned formats (use the host)."""
+    return default_date_parser.parse(text, key)
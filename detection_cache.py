@@ -0,0 +1,66 @@
+import hashlib
+import json
+import time
+from typing import Dict, Optional
+
+from bs4 import BeautifulSoup
+
+from http_cache import SQLiteStore
+from selector_plan import parse_page, signature
+
+# -----------------------------------------------------------------------------
+# Persistent cache for LLM selector detection
+# -----------------------------------------------------------------------------
+
+
+def page_fingerprint(html: str, soup: Optional[BeautifulSoup] = None) -> str:
+    """Hash of a page's structure: the set of (tag, classes) signatures under <body>.
+
+    The set ignores text and how often a signature repeats, so a listing page
+    keeps its fingerprint when new articles appear but not after a redesign.
+    ``soup`` is ``html`` already parsed.
+    """
+    if soup is None:
+        soup = parse_page(html)
+    root = soup.body or soup
+    signatures = {signature(el) for el in root.find_all(True)}
+    return hashlib.sha256('\n'.join(sorted(signatures)).encode('utf-8')).hexdigest()[:32]
+
+
+class DetectionCache(SQLiteStore):
+    """Detected selector mappings keyed by kind, host and page fingerprint, with a TTL."""
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS detections ("
+        " key TEXT PRIMARY KEY,"
+        " mapping TEXT NOT NULL,"
+        " created_at REAL NOT NULL)",
+    )
+
+    def __init__(self, path: str, ttl: float):
+        super().__init__(path)
+        self.ttl = ttl
+
+    @staticmethod
+    def key(kind: str, host: str, fingerprint: str) -> str:
+        return f'{kind}:{host}:{fingerprint}'
+
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        row = self._conn().execute(
+            "SELECT mapping, created_at FROM detections WHERE key = ?", (key,)
+        ).fetchone()
+        if not row:
+            return None
+        if time.time() - row[1] >= self.ttl:
+            self.delete(key)
+            return None
+        return json.loads(row[0])
+
+    def put(self, key: str, mapping: Dict[str, str]) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO detections (key, mapping, created_at) VALUES (?, ?, ?)",
+            (key, json.dumps(mapping), time.time()),
+        )
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM detections WHERE key = ?", (key,))
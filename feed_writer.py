@@ -0,0 +1,182 @@
+import json
+import mimetypes
+import os
+import re
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from dates import parse_date
+
+# -----------------------------------------------------------------------------
+# Streaming RSS 2.0 / Atom / JSON Feed writers
+# -----------------------------------------------------------------------------
+# Documents are written directly from the item dicts as a sequence of string
+# chunks, without building an element tree. Output is compact unless
+# ``pretty`` is set.
+
+GENERATOR = 'Site2RSS'
+
+# Characters XML 1.0 does not allow, even escaped
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+
+def _text(value) -> str:
+    return _INVALID_XML.sub('', str(value)).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _attr(value) -> str:
+    return '"' + _text(value).replace('"', '&quot;') + '"'
+
+
+def _utc(value) -> Optional[datetime]:
+    """Aware UTC datetime from a datetime or date string; naive values are taken as UTC."""
+    if isinstance(value, str):
+        value = parse_date(value)
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _rfc3339(value: datetime) -> str:
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _image_type(url: str) -> str:
+    return _type_of(os.path.splitext(url.split('?', 1)[0])[1].lower())
+
+
+@lru_cache(maxsize=64)
+def _type_of(extension: str) -> str:
+    return mimetypes.types_map.get(extension, 'image/jpeg')
+
+
+def _title(feed) -> str:
+    return feed.name or feed.url
+
+
+def iter_rss(feed, items: List[Dict], pretty: bool = False, updated: Optional[datetime] = None) -> Iterator[str]:
+    nl, ind = ('\n', '  ') if pretty else ('', '')
+    yield "<?xml version='1.0' encoding='UTF-8'?>" + nl
+    yield ('<rss xmlns:atom="http://www.w3.org/2005/Atom" '
+           'xmlns:dc="http://purl.org/dc/elements/1.1/" version="2.0">' + nl)
+    yield f'{ind}<channel>{nl}'
+    pre = ind * 2
+    yield f'{pre}<title>{_text(_title(feed))}</title>{nl}'
+    yield f'{pre}<link>{_text(feed.url)}</link>{nl}'
+    yield f'{pre}<description>{_text(f"RSS feed generated from {feed.url}")}</description>{nl}'
+    yield f'{pre}<docs>http://www.rssboard.org/rss-specification</docs>{nl}'
+    yield f'{pre}<generator>{GENERATOR}</generator>{nl}'
+    yield f'{pre}<lastBuildDate>{format_datetime(_utc(updated or datetime.now(timezone.utc)))}</lastBuildDate>{nl}'
+
+    pre = ind * 3
+    for itm in items:
+        parts = [f'{ind * 2}<item>{nl}', f'{pre}<title>{_text(itm["title"])}</title>{nl}',
+                 f'{pre}<link>{_text(itm["link"])}</link>{nl}']
+        if itm.get('content'):
+            parts.append(f'{pre}<description>{_text(itm["content"])}</description>{nl}')
+        if itm.get('guid'):
+            permalink = 'true' if itm['guid'] == itm['link'] else 'false'
+            parts.append(f'{pre}<guid isPermaLink="{permalink}">{_text(itm["guid"])}</guid>{nl}')
+        if itm.get('author'):
+            parts.append(f'{pre}<dc:creator>{_text(itm["author"])}</dc:creator>{nl}')
+        if itm.get('image'):
+            parts.append(f'{pre}<enclosure url={_attr(itm["image"])} length="0" '
+                         f'type={_attr(_image_type(itm["image"]))}/>{nl}')
+        date = _utc(itm.get('date'))
+        if date:
+            parts.append(f'{pre}<pubDate>{format_datetime(date)}</pubDate>{nl}')
+        parts.append(f'{ind * 2}</item>{nl}')
+        yield ''.join(parts)
+
+    yield f'{ind}</channel>{nl}</rss>{nl}'
+
+
+def iter_atom(feed, items: List[Dict], pretty: bool = False, updated: Optional[datetime] = None) -> Iterator[str]:
+    nl, ind = ('\n', '  ') if pretty else ('', '')
+    dates = [_utc(itm.get('date')) for itm in items]
+    updated = _utc(updated) or max((d for d in dates if d), default=None) or datetime.now(timezone.utc)
+
+    yield "<?xml version='1.0' encoding='UTF-8'?>" + nl
+    yield '<feed xmlns="http://www.w3.org/2005/Atom">' + nl
+    yield f'{ind}<id>{_text(feed.url)}</id>{nl}'
+    yield f'{ind}<title>{_text(_title(feed))}</title>{nl}'
+    yield f'{ind}<updated>{_rfc3339(updated)}</updated>{nl}'
+    yield f'{ind}<link href={_attr(feed.url)} rel="alternate"/>{nl}'
+    # Required at feed level unless every entry has an author
+    yield f'{ind}<author><name>{_text(_title(feed))}</name></author>{nl}'
+    yield f'{ind}<generator>{GENERATOR}</generator>{nl}'
+
+    pre = ind * 2
+    for itm, date in zip(items, dates):
+        parts = [f'{ind}<entry>{nl}', f'{pre}<id>{_text(itm.get("guid") or itm["link"])}</id>{nl}',
+                 f'{pre}<title>{_text(itm["title"])}</title>{nl}',
+                 f'{pre}<link href={_attr(itm["link"])} rel="alternate"/>{nl}',
+                 f'{pre}<updated>{_rfc3339(date or updated)}</updated>{nl}']
+        if date:
+            parts.append(f'{pre}<published>{_rfc3339(date)}</published>{nl}')
+        if itm.get('author'):
+            parts.append(f'{pre}<author><name>{_text(itm["author"])}</name></author>{nl}')
+        if itm.get('content'):
+            parts.append(f'{pre}<summary type="html">{_text(itm["content"])}</summary>{nl}')
+        if itm.get('image'):
+            parts.append(f'{pre}<link href={_attr(itm["image"])} rel="enclosure" '
+                         f'type={_attr(_image_type(itm["image"]))} length="0"/>{nl}')
+        parts.append(f'{ind}</entry>{nl}')
+        yield ''.join(parts)
+
+    yield '</feed>' + nl
+
+
+def iter_json_feed(feed, items: List[Dict], pretty: bool = False, updated: Optional[datetime] = None,
+                   feed_url: Optional[str] = None) -> Iterator[str]:
+    """JSON Feed 1.1 (https://jsonfeed.org/version/1.1)."""
+    indent = 2 if pretty else None
+    sep = (',', ': ') if pretty else (',', ':')
+    head = {
+        'version': 'https://jsonfeed.org/version/1.1',
+        'title': _title(feed),
+        'home_page_url': feed.url,
+        'description': f'Feed generated from {feed.url}',
+    }
+    if feed_url:
+        head['feed_url'] = feed_url
+    yield json.dumps(head, ensure_ascii=False, separators=sep)[:-1] + sep[0] + '"items":['
+
+    for i, itm in enumerate(items):
+        entry = {'id': itm.get('guid') or itm['link'], 'url': itm['link'], 'title': itm['title']}
+        if itm.get('content'):
+            entry['content_html'] = itm['content']
+        else:
+            entry['content_text'] = ''
+        date = _utc(itm.get('date'))
+        if date:
+            entry['date_published'] = _rfc3339(date)
+        if itm.get('author'):
+            entry['authors'] = [{'name': itm['author']}]
+        if itm.get('image'):
+            entry['image'] = itm['image']
+        yield (sep[0] if i else '') + json.dumps(entry, ensure_ascii=False, indent=indent, separators=sep)
+
+    yield ']}\n'
+
+
+class FeedFormat(NamedTuple):
+    mimetype: str
+    write: Callable[..., Iterator[str]]
+
+
+# URL suffix -> format
+FORMATS: Dict[str, FeedFormat] = {
+    'xml': FeedFormat('application/rss+xml', iter_rss),
+    'atom': FeedFormat('application/atom+xml', iter_atom),
+    'json': FeedFormat('application/feed+json', iter_json_feed),
+}
+
+
+def render(fmt: str, feed, items: List[Dict], **options) -> bytes:
+    """A whole document in ``fmt`` ('xml', 'atom' or 'json'), UTF-8 encoded."""
+    return ''.join(FORMATS[fmt].write(feed, items, **options)).encode('utf-8')
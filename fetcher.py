@@ -0,0 +1,229 @@
+import asyncio
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+# -----------------------------------------------------------------------------
+# Shared HTTP fetch layer: pooled connections, per-host rate limit, retries
+# -----------------------------------------------------------------------------
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Classic token bucket; ``acquire`` blocks until a token is available."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token if one is available (returns 0), else return the seconds until one is."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self) -> float:
+        """Take one token, returning the number of seconds spent waiting."""
+        waited = 0.0
+        while True:
+            delay = self.reserve()
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    async def acquire_async(self) -> float:
+        """``acquire`` for coroutines: waits on the event loop instead of blocking the thread."""
+        waited = 0.0
+        while True:
+            delay = self.reserve()
+            if not delay:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+class Fetcher:
+    """One pooled ``requests.Session`` shared by the scraper and the picker proxy.
+
+    Keep-alive connections are reused per host (up to ``pool_size`` each), every
+    request first takes a token from its host's bucket, and 429/5xx responses
+    or connection errors are retried with exponential backoff, honoring
+    ``Retry-After`` up to ``max_retry_after`` seconds.
+    """
+
+    def __init__(self, pool_size: int = 10, max_hosts: int = 100,
+                 rate: float = 5.0, burst: int = 10,
+                 retries: int = 2, backoff: float = 0.5, max_retry_after: float = 30.0):
+        self.rate = rate
+        self.burst = burst
+        self.retries = retries
+        self.backoff = backoff
+        self.max_retry_after = max_retry_after
+
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=max_hosts, pool_maxsize=pool_size)
+        self.session.mount('http://', self._adapter)
+        self.session.mount('https://', self._adapter)
+
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._counters = {'requests': 0, 'retries': 0, 'errors': 0, 'throttle_seconds': 0.0}
+
+    @classmethod
+    def from_env(cls) -> 'Fetcher':
+        return cls(
+            pool_size=int(os.getenv('FETCH_POOL_SIZE', 10)),
+            rate=float(os.getenv('FETCH_HOST_RATE', 5)),
+            burst=int(os.getenv('FETCH_HOST_BURST', 10)),
+            retries=int(os.getenv('FETCH_RETRIES', 2)),
+        )
+
+    def _bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return bucket
+
+    def _count(self, key: str, amount=1):
+        with self._lock:
+            self._counters[key] += amount
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """``requests.get`` through the pool; the final response is returned even if it is an error."""
+        bucket = self._bucket(urlsplit(url).netloc)
+        attempt = 0
+        while True:
+            self._count('throttle_seconds', bucket.acquire())
+            self._count('requests')
+            try:
+                resp = self.session.get(url, **kwargs)
+            except requests.ConnectionError:
+                if attempt >= self.retries:
+                    self._count('errors')
+                    raise
+                delay = self.backoff * 2 ** attempt
+            else:
+                if resp.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    return resp
+                delay = _retry_after_seconds(resp.headers.get('Retry-After'))
+                if delay is None:
+                    delay = self.backoff * 2 ** attempt
+                elif delay > self.max_retry_after:
+                    return resp
+                resp.close()
+            attempt += 1
+            self._count('retries')
+            time.sleep(delay)
+
+    def stats(self) -> Dict[str, float]:
+        """Counters plus connection reuse across all host pools."""
+        pools = self._adapter.poolmanager.pools
+        num_requests = num_connections = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                num_requests += pool.num_requests
+                num_connections += pool.num_connections
+        with self._lock:
+            stats = dict(self._counters)
+        stats['connections_opened'] = num_connections
+        stats['pool_hit_rate'] = 1 - num_connections / num_requests if num_requests else 0.0
+        return stats
+
+
+class AsyncFetcher:
+    """httpx counterpart of ``Fetcher`` for the async (ASGI) endpoints.
+
+    It shares the host buckets, retry policy and counters of ``fetcher``, so
+    sync and async requests to one host are throttled together. The client is
+    created on first use, inside the running event loop.
+    """
+
+    def __init__(self, fetcher: Fetcher, max_connections: int = 1000):
+        self.fetcher = fetcher
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections // 10),
+            )
+        return self._client
+
+    async def get(self, url: str, timeout: float = 10, headers: Optional[Dict[str, str]] = None,
+                  stream: bool = False) -> httpx.Response:
+        """Like ``Fetcher.get``; the final response is returned even if it is an error.
+
+        With ``stream`` the body is not read; the caller must ``aclose()`` the response.
+        """
+        fetcher = self.fetcher
+        bucket = fetcher._bucket(urlsplit(url).netloc)
+        attempt = 0
+        while True:
+            fetcher._count('throttle_seconds', await bucket.acquire_async())
+            fetcher._count('requests')
+            try:
+                client = self._get_client()
+                request = client.build_request('GET', url, headers=headers, timeout=timeout)
+                resp = await client.send(request, stream=stream)
+            except httpx.NetworkError:
+                if attempt >= fetcher.retries:
+                    fetcher._count('errors')
+                    raise
+                delay = fetcher.backoff * 2 ** attempt
+            else:
+                if resp.status_code not in RETRY_STATUSES or attempt >= fetcher.retries:
+                    return resp
+                delay = _retry_after_seconds(resp.headers.get('Retry-After'))
+                if delay is None:
+                    delay = fetcher.backoff * 2 ** attempt
+                elif delay > fetcher.max_retry_after:
+                    return resp
+                await resp.aclose()
+            attempt += 1
+            fetcher._count('retries')
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+default_fetcher = Fetcher.from_env()
+default_async_fetcher = AsyncFetcher(default_fetcher,
+                                     max_connections=int(os.getenv('FETCH_ASYNC_CONNECTIONS', 1000)))
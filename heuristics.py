@@ -0,0 +1,219 @@
+import math
+import os
+import re
+from collections import Counter
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import soupsieve
+from bs4 import BeautifulSoup, Tag
+
+from selector_plan import parse_page, signature, stable_classes
+
+# -----------------------------------------------------------------------------
+# Offline selector detection
+# -----------------------------------------------------------------------------
+
+MIN_GROUP = 3   # fewer repetitions than this is not a list
+SAMPLE = 10     # members inspected per group
+MAX_SCORED_GROUPS = 64  # largest sibling groups scored; the rest are smaller than any of them
+
+# Detection reads at most this many characters of a page, from <body> on, so
+# its cost doesn't grow with the page: the first screens show the listing.
+DETECT_MAX_CHARS = int(os.getenv('DETECT_MAX_CHARS', 128 * 1024))
+_BODY_START = re.compile(r'<body[\s>]', re.I)
+# ``tag`` or ``tag.class`` as built by _candidates (class escaped by soupsieve)
+_SIMPLE = re.compile(r'^([a-zA-Z][\w-]*)(?:\.([\w-]+))?$')
+
+# Elements that are never list items by themselves
+_INLINE_TAGS = {'a', 'span', 'img', 'br', 'b', 'i', 'em', 'strong', 'small', 'time', 'svg', 'path',
+                'option', 'meta', 'link', 'script', 'style', 'source', 'picture', 'button', 'input'}
+_CHROME_TAGS = {'nav', 'header', 'footer', 'aside', 'form'}
+_CHROME_CLASS = re.compile(r'nav|menu|breadcrumb|pagination|sidebar|widget|share|social|footer|cookie', re.I)
+
+_HEADINGS = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']
+_TITLE_CLASS = re.compile(r'title|headline|heading', re.I)
+_DATE_CLASS = re.compile(r'date|time|posted|published', re.I)
+_AUTHOR_CLASS = re.compile(r'author|byline', re.I)
+_SUMMARY_CLASS = re.compile(r'summary|excerpt|teaser|desc|snippet|dek|lede', re.I)
+
+
+class Detection(NamedTuple):
+    mapping: Dict[str, str]
+    score: float
+    count: int         # number of items in the winning group
+    confidence: float  # share of sampled items where title and link resolve
+
+    @property
+    def confident(self) -> bool:
+        return self.confidence >= 0.8 and self.count >= MIN_GROUP
+
+
+def _in_chrome(el: Tag) -> bool:
+    for node in [el] + list(el.parents):
+        if node.name in _CHROME_TAGS:
+            return True
+        if any(_CHROME_CLASS.search(c) for c in node.get('class', ())):
+            return True
+    return False
+
+
+def _fraction(sample: List[Tag], test: Callable[[Tag], object]) -> float:
+    return sum(1 for m in sample if test(m)) / len(sample)
+
+
+def _score(members: List[Tag]) -> float:
+    """Score a sibling group by repetition, links, text shape and article-like children."""
+    sample = members[:SAMPLE]
+    link_frac = _fraction(sample, lambda m: m.find('a', href=True))
+    if link_frac < 0.6:
+        return 0.0
+    text_len = link_len = 0
+    for m in sample:
+        text_len += len(m.get_text(' ', strip=True))
+        link_len += sum(len(a.get_text(' ', strip=True)) for a in m.find_all('a'))
+    avg_text = text_len / len(sample)
+    if avg_text < 15:
+        return 0.0
+    # Menus and tag clouds are nearly all link text; articles have more around the link
+    link_density = link_len / max(1, text_len)
+
+    heading_frac = _fraction(sample, lambda m: m.find(_HEADINGS) or m.find(class_=_TITLE_CLASS))
+    date_frac = _fraction(sample, lambda m: m.find('time') or m.find(class_=_DATE_CLASS))
+    image_frac = _fraction(sample, lambda m: m.find('img'))
+
+    score = math.log2(1 + len(members)) * link_frac
+    score *= 1 + heading_frac + date_frac + 0.5 * image_frac
+    score *= 1.2 - 0.6 * link_density
+    score *= 0.5 + min(avg_text, 400) / 400
+    if _in_chrome(members[0]):
+        score *= 0.2
+    return score
+
+
+def _candidates(el: Tag, generic_first: bool = True) -> List[str]:
+    """Selectors for ``el``: bare tag, tag with one class, full signature, parent > signature."""
+    classed = [f'{el.name}.{soupsieve.escape(c)}' for c in stable_classes(el)] + [signature(el)]
+    names = [el.name] + classed if generic_first else classed + [el.name]
+    if isinstance(el.parent, Tag) and el.parent.name != '[document]':
+        names.append(f'{signature(el.parent)} > {signature(el)}')
+    return list(dict.fromkeys(names))
+
+
+def _item_selector(soup: BeautifulSoup, members: List[Tag], counts: Counter) -> str:
+    # Shortest selector matching exactly the group; ``tag`` and ``tag.class`` are
+    # counted from ``counts`` (of block elements) instead of another pass over the page
+    for selector in _candidates(members[0]):
+        simple = _SIMPLE.match(selector)
+        matches = counts[simple.groups()] if simple else len(soupsieve.select(selector, soup))
+        if matches == len(members):
+            return selector
+    parent = members[0].parent
+    prefix = f'#{soupsieve.escape(parent["id"])}' if parent.get('id') else signature(parent)
+    return f'{prefix} > {signature(members[0])}'
+
+
+def _relative_selector(pairs: List[Tuple[Tag, Tag]], sample_size: int) -> str:
+    """A selector that finds each paired element as the first match inside its item."""
+    pairs = [(m, el) for m, el in pairs if el is not None]
+    if not pairs or len(pairs) < sample_size / 2:
+        return ''
+    # Class-qualified selectors first: they survive extra elements inside an item
+    for selector in _candidates(pairs[0][1], generic_first=False):
+        hits = sum(1 for m, el in pairs if soupsieve.select_one(selector, m) is el)
+        if hits >= 0.8 * len(pairs):
+            return selector
+    return ''
+
+
+def _find_title(m: Tag) -> Optional[Tag]:
+    found = m.find(_HEADINGS) or m.find(class_=_TITLE_CLASS)
+    if found:
+        return found
+    links = [a for a in m.find_all('a', href=True) if a.get_text(strip=True)]
+    return max(links, key=lambda a: len(a.get_text(strip=True)), default=None)
+
+
+def _find_content(m: Tag, title: Optional[Tag]) -> Optional[Tag]:
+    found = m.find(class_=_SUMMARY_CLASS)
+    if found and found is not title:
+        return found
+    for p in m.find_all('p'):
+        if len(p.get_text(strip=True)) > 40:
+            return p
+    return None
+
+
+def detection_window(html: str) -> str:
+    """The part of a page detection looks at (see ``DETECT_MAX_CHARS``)."""
+    if len(html) <= DETECT_MAX_CHARS:
+        return html
+    body = _BODY_START.search(html)
+    start = body.start() if body else 0
+    return html[start:start + DETECT_MAX_CHARS]
+
+
+def parse_for_detection(html: str) -> BeautifulSoup:
+    """Parse the detection window of a page; the soup can be shared by every detection step."""
+    return parse_page(detection_window(html))
+
+
+def detect_mapping(html: str, soup: Optional[BeautifulSoup] = None) -> Optional[Detection]:
+    """Detect a selector mapping locally in one pass over the DOM.
+
+    Siblings are grouped by parent and signature (tag plus stable classes), the
+    best-scoring group becomes the item selector and field selectors are
+    derived from what its members have in common. ``soup`` is the page from
+    ``parse_for_detection``, parsed here if not given.
+    """
+    if soup is None:
+        soup = parse_for_detection(html)
+    groups: Dict[Tuple[int, str], List[Tag]] = {}
+    counts: Counter = Counter()  # (tag, None) and (tag, class) -> number of elements
+    for el in soup.find_all(True):
+        if el.name in _INLINE_TAGS or not isinstance(el.parent, Tag):
+            continue
+        groups.setdefault((id(el.parent), signature(el)), []).append(el)
+        counts[el.name, None] += 1
+        counts.update((el.name, cls) for cls in set(el.get('class', ())))
+
+    lists = sorted((members for members in groups.values() if len(members) >= MIN_GROUP),
+                   key=len, reverse=True)
+    best, best_score = None, 0.0
+    for members in lists[:MAX_SCORED_GROUPS]:
+        score = _score(members)
+        if score > best_score:
+            best, best_score = members, score
+    if best is None:
+        return None
+
+    sample = best[:SAMPLE]
+    titles = [(m, _find_title(m)) for m in sample]
+    title_selector = _relative_selector(titles, len(sample))
+
+    link_pairs = []
+    for m, title in titles:
+        if title is not None and title.name == 'a' and title.has_attr('href'):
+            link_pairs.append((m, title))
+        else:
+            link_pairs.append((m, (title.find('a', href=True) if title else None) or m.find('a', href=True)))
+    link_selector = _relative_selector(link_pairs, len(sample))
+
+    mapping = {
+        'item_selector': _item_selector(soup, best, counts),
+        'title_selector': title_selector,
+        'link_selector': link_selector,
+        'content_selector': _relative_selector([(m, _find_content(m, t)) for m, t in titles], len(sample)),
+        'date_selector': _relative_selector(
+            [(m, m.find('time') or m.find(class_=_DATE_CLASS)) for m in sample], len(sample)),
+        'author_selector': _relative_selector(
+            [(m, m.find(class_=_AUTHOR_CLASS) or m.find(rel='author')) for m in sample], len(sample)),
+        'image_selector': _relative_selector([(m, m.find('img')) for m in sample], len(sample)),
+    }
+
+    resolved = 0
+    if title_selector and link_selector:
+        for m in sample:
+            link = soupsieve.select_one(link_selector, m)
+            if soupsieve.select_one(title_selector, m) is not None and link is not None and link.has_attr('href'):
+                resolved += 1
+    return Detection(mapping, best_score, len(best), resolved / len(sample))
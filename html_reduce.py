@@ -0,0 +1,92 @@
+import os
+import re
+from typing import NamedTuple
+
+from bs4 import Comment, NavigableString, Tag
+
+from selector_plan import parse_page, signature
+
+# -----------------------------------------------------------------------------
+# DOM skeleton reducer for LLM prompts
+# -----------------------------------------------------------------------------
+
+# Rough prompt budget for the HTML part, in tokens (~4 characters each)
+LLM_HTML_BUDGET = int(os.getenv('LLM_HTML_BUDGET', 12000))
+
+# Never useful for choosing selectors
+_DROP_TAGS = ['script', 'style', 'noscript', 'svg', 'canvas', 'iframe', 'template',
+              'link', 'object', 'embed', 'video', 'audio', 'input', 'select', 'textarea']
+
+# Attributes a CSS selector (or the field it points at) may depend on
+_KEEP_ATTRS = {'id', 'class', 'href', 'src', 'datetime', 'itemprop', 'itemtype',
+               'property', 'name', 'content', 'rel', 'role'}
+
+# (exemplars kept per sibling signature, max text length), applied until the page fits
+_PASSES = ((3, 120), (2, 60), (1, 30))
+
+
+class ReducedHtml(NamedTuple):
+    html: str
+    original_chars: int
+    reduced_chars: int
+
+    @property
+    def ratio(self) -> float:
+        """Original size divided by reduced size."""
+        return self.original_chars / max(1, self.reduced_chars)
+
+
+def _strip(soup) -> None:
+    for comment in soup.find_all(string=lambda s: isinstance(s, Comment)):
+        comment.extract()
+    for el in soup.find_all(_DROP_TAGS):
+        el.decompose()
+    # Only structured metadata (og:image, article:published_time, ...) is kept from <meta>
+    for el in soup.find_all('meta'):
+        if not (el.get('property') or el.get('itemprop')):
+            el.decompose()
+    for el in soup.find_all(True):
+        el.attrs = {k: v for k, v in el.attrs.items() if k in _KEEP_ATTRS}
+
+
+def _collapse(el: Tag, keep: int, text_limit: int) -> None:
+    """Keep ``keep`` children per signature, truncate long text, recursively."""
+    seen = {}
+    dropped = 0
+    for child in list(el.children):
+        if isinstance(child, Tag):
+            sig = signature(child)
+            seen[sig] = seen.get(sig, 0) + 1
+            if seen[sig] > keep:
+                child.decompose()
+                dropped += 1
+            else:
+                _collapse(child, keep, text_limit)
+        elif isinstance(child, NavigableString) and not isinstance(child, Comment):
+            text = ' '.join(child.split())
+            if len(text) > text_limit:
+                text = text[:text_limit] + '…'
+            if text != child:
+                child.replace_with(text)
+    if dropped:
+        el.append(Comment(f' {dropped} more similar elements '))
+
+
+def reduce_html(html: str, budget_tokens: int = LLM_HTML_BUDGET) -> ReducedHtml:
+    """Shrink a page to a selector-preserving skeleton within ``budget_tokens``.
+
+    Non-content nodes and unused attributes are removed, repeated siblings are
+    collapsed to a few exemplars and long text is truncated; each pass is more
+    aggressive until the result fits, and a hard cut is the last resort.
+    """
+    budget_chars = budget_tokens * 4
+    soup = parse_page(html)
+    _strip(soup)
+    out = ''
+    for keep, text_limit in _PASSES:
+        _collapse(soup, keep, text_limit)
+        out = re.sub(r'>\s+<', '><', str(soup))
+        if len(out) <= budget_chars:
+            break
+    out = out[:budget_chars]
+    return ReducedHtml(out, len(html), len(out))
@@ -0,0 +1,97 @@
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Optional
+
+# -----------------------------------------------------------------------------
+# Persistent page cache (SQLite)
+# -----------------------------------------------------------------------------
+
+
+class SQLiteStore:
+    """Base for small SQLite-backed caches.
+
+    One connection is opened per thread; the file can be shared by several
+    worker processes. Subclasses list their DDL in ``SCHEMA``.
+    """
+
+    SCHEMA = ()
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        for ddl in self.SCHEMA:
+            self._conn().execute(ddl)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            # Readers don't block the writer (or each other) across processes
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+
+class CachedPage(NamedTuple):
+    url: str
+    body: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float  # unix time of the last 200/304 from the origin
+
+
+class HttpCache(SQLiteStore):
+    """Stores page bodies with their validators so refetches can be conditional.
+
+    Pages not fetched or revalidated for ``max_age`` seconds are deleted, at
+    most once per ``prune_interval`` seconds, when a page is stored.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS pages ("
+        " url TEXT PRIMARY KEY,"
+        " body TEXT NOT NULL,"
+        " etag TEXT,"
+        " last_modified TEXT,"
+        " fetched_at REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_pages_fetched_at ON pages (fetched_at)",
+    )
+
+    def __init__(self, path: str, max_age: float, prune_interval: float = 3600):
+        super().__init__(path)
+        self.max_age = max_age
+        self.prune_interval = prune_interval
+        self._pruned_at = 0.0
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        row = self._conn().execute(
+            "SELECT url, body, etag, last_modified, fetched_at FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+        return CachedPage(*row) if row else None
+
+    def put(self, url: str, body: str, etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> CachedPage:
+        page = CachedPage(url, body, etag, last_modified, time.time())
+        self._conn().execute(
+            "INSERT OR REPLACE INTO pages (url, body, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?)",
+            page,
+        )
+        if page.fetched_at - self._pruned_at >= self.prune_interval:
+            self._pruned_at = page.fetched_at
+            self.prune()
+        return page
+
+    def prune(self) -> int:
+        """Delete pages older than ``max_age``; returns how many were deleted."""
+        return self._conn().execute(
+            "DELETE FROM pages WHERE fetched_at < ?", (time.time() - self.max_age,)
+        ).rowcount
+
+    def touch(self, url: str) -> None:
+        """Mark a page as revalidated (origin answered 304)."""
+        self._conn().execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+
+    def delete(self, url: str) -> None:
+        self._conn().execute("DELETE FROM pages WHERE url = ?", (url,))
@@ -0,0 +1,175 @@
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# -----------------------------------------------------------------------------
+# In-process LRU cache bounded by size in bytes
+# -----------------------------------------------------------------------------
+
+# Strings shorter than this are stored as-is even when compression is on
+COMPRESS_MIN = 4096
+
+
+class _Compressed(bytes):
+    """zlib data standing in for a str (or bytes) value or field."""
+
+    text = True
+
+
+class _CompressedBytes(_Compressed):
+    text = False
+
+
+class _Entry:
+    __slots__ = ('value', 'size', 'expires')
+
+    def __init__(self, value, size: int, expires: Optional[float]):
+        self.value = value
+        self.size = size
+        self.expires = expires
+
+
+def sizeof(value: Any) -> int:
+    """Approximate memory held by a cached value (strings, bytes, tuples, dicts, lists)."""
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        size += sum(sizeof(v) for v in value)
+    elif isinstance(value, dict):
+        size += sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    return size
+
+
+class MemoryCache:
+    """Thread-safe LRU cache that evicts by total size instead of entry count.
+
+    Entries expire ``ttl`` seconds after they are set (None keeps them until
+    evicted). With ``compress``, long ``str``/``bytes`` values, and long
+    string fields of named tuples such as ``CachedPage.body``, are stored
+    zlib-compressed and decompressed on ``get``.
+    """
+
+    def __init__(self, max_bytes: int, ttl: Optional[float] = None, compress: bool = False, name: str = ''):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.compress = compress
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        self._entries: 'OrderedDict[Hashable, _Entry]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, max_bytes: Optional[int] = None, ttl: Optional[float] = None,
+                  compress: Optional[bool] = None) -> None:
+        """Change limits at runtime; shrinking evicts right away. New settings apply to new entries."""
+        with self._lock:
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            if ttl is not None:
+                self.ttl = ttl
+            if compress is not None:
+                self.compress = compress
+            self._evict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry.expires is not None and entry.expires <= time.monotonic():
+                self._remove(key, entry)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry.value
+        return _unpack(value)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, size: Optional[int] = None) -> None:
+        """Store ``value``; a value larger than the whole cache is not stored."""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl is not None and ttl <= 0:
+            self.delete(key)
+            return
+        stored = _pack(value) if self.compress else value
+        size = sizeof(stored) if size is None else size
+        expires = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.size
+            if size > self.max_bytes:
+                return
+            self._entries[key] = _Entry(stored, size, expires)
+            self.bytes += size
+            self._evict()
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._remove(key, entry)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def _remove(self, key, entry: _Entry) -> None:
+        del self._entries[key]
+        self.bytes -= entry.size
+
+    def _evict(self) -> None:
+        # Least recently used first
+        while self.bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self.bytes -= entry.size
+            self.evictions += 1
+
+
+def _compress(value):
+    if isinstance(value, str) and len(value) >= COMPRESS_MIN:
+        return _Compressed(zlib.compress(value.encode('utf-8'), 1))
+    if isinstance(value, bytes) and not isinstance(value, _Compressed) and len(value) >= COMPRESS_MIN:
+        return _CompressedBytes(zlib.compress(value, 1))
+    return value
+
+
+def _decompress(value):
+    if isinstance(value, _Compressed):
+        data = zlib.decompress(value)
+        return data.decode('utf-8') if value.text else data
+    return value
+
+
+def _pack(value):
+    if isinstance(value, tuple) and hasattr(value, '_fields'):
+        return value._make(_compress(v) for v in value)
+    return _compress(value)
+
+
+def _unpack(value):
+    if isinstance(value, tuple) and hasattr(value, '_fields'):
+        if any(isinstance(v, _Compressed) for v in value):
+            return value._make(_decompress(v) for v in value)
+        return value
+    return _decompress(value)
@@ -0,0 +1,234 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# -----------------------------------------------------------------------------
+# In-process metrics with Prometheus text output
+# -----------------------------------------------------------------------------
+# Values are per process; with several workers each one exposes its own.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_REGISTRY: List['_Metric'] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value: float) -> str:
+    # Exact integers, and Python's shortest round-trip form for everything else
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class _Metric:
+    type = ''
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, '')) for n in self.labelnames)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}']
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield f'{self.name}{_labels(self.labelnames, key)} {_number(value)}'
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # key -> [count per bucket (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts = entry[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            entry[1] += value
+
+    def samples(self):
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="%s"' % ('+Inf' if bound == float('inf') else f'{bound:g}')
+                yield f'{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}'
+            yield f'{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}'
+            yield f'{self.name}_count{_labels(self.labelnames, key)} {cumulative}'
+
+
+class GaugeFunction(_Metric):
+    """A gauge whose labelled values are read from ``fn`` at scrape time."""
+
+    type = 'gauge'
+
+    def __init__(self, name, help, fn: Callable[[], Dict[Tuple[str, ...], float]], labels=()):
+        super().__init__(name, help, labels)
+        self.fn = fn
+
+    def samples(self):
+        for key, value in self.fn().items():
+            yield f'{self.name}{_labels(self.labelnames, key)} {_number(value)}'
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return '\n'.join(metric.render() for metric in _REGISTRY) + '\n'
+
+
+# -----------------------------------------------------------------------------
+# Scraper and feed metrics
+# -----------------------------------------------------------------------------
+
+STAGE_SECONDS = Histogram(
+    'site2rss_stage_seconds',
+    'Time per pipeline stage (fetch, parse, select, dates, enrich, llm, serialize) by host.',
+    ('stage', 'host'))
+PAGE_CACHE = Counter(
+    'site2rss_page_cache_total', 'Page cache lookups by result (hit, revalidated, miss).', ('host', 'result'))
+PAGES_FETCHED = Counter(
+    'site2rss_pages_fetched_total', 'Pages requested from origins, by HTTP status.', ('host', 'status'))
+LLM_CALLS = Counter(
+    'site2rss_llm_calls_total', 'Gemini calls by kind (listing, article) and result.', ('kind', 'result'))
+DETECTION_CACHE = Counter(
+    'site2rss_detection_cache_total', 'Persistent selector detection cache lookups.', ('kind', 'result'))
+FEED_BUILD_SECONDS = Histogram(
+    'site2rss_feed_build_seconds', 'Time to scrape and publish a feed.', ('feed',))
+FEED_BUILDS = Counter(
+    'site2rss_feed_builds_total', 'Feed builds by result (ok, error).', ('feed', 'result'))
+FEED_ITEMS = Counter(
+    'site2rss_feed_items_total', 'Items produced by feed builds.', ('feed',))
+FEED_PAGES = Counter(
+    'site2rss_feed_pages_fetched_total', 'Origin requests made by feed builds.', ('feed',))
+
+
+class Timings:
+    """Per-request (or per-build) totals, collected while ``collect()`` is active.
+
+    Collections nest: a feed build inside a request also counts towards the request.
+    """
+
+    def __init__(self, parent: Optional['Timings'] = None):
+        self.parent = parent
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.pages_fetched = 0
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        if self.parent is not None:
+            self.parent.add(stage, seconds)
+
+    def add_page(self) -> None:
+        with self._lock:
+            self.pages_fetched += 1
+        if self.parent is not None:
+            self.parent.add_page()
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value; stages run concurrently sum their durations."""
+        parts = [f'{stage};dur={seconds * 1000:.1f}' for stage, seconds in self.stages.items()]
+        parts.append(f'total;dur={(time.perf_counter() - self.started) * 1000:.1f}')
+        return ', '.join(parts)
+
+
+_current: contextvars.ContextVar[Optional[Timings]] = contextvars.ContextVar('site2rss_timings', default=None)
+
+
+@contextmanager
+def collect() -> Iterator[Timings]:
+    """Collect stage times and fetch counts of everything run in this context."""
+    timings = Timings(_current.get())
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+def start_collecting() -> Tuple[Timings, contextvars.Token]:
+    """``collect()`` for code that cannot use a with block (request hooks)."""
+    timings = Timings(_current.get())
+    return timings, _current.set(timings)
+
+
+def stop_collecting(token: contextvars.Token) -> None:
+    _current.reset(token)
+
+
+def record_stage(stage: str, host: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage=stage, host=host)
+    timings = _current.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+@contextmanager
+def stage(name: str, host: str = '') -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, host, time.perf_counter() - start)
+
+
+def page_fetched(host: str, status: int) -> None:
+    PAGES_FETCHED.inc(host=host, status=status)
+    timings = _current.get()
+    if timings is not None:
+        timings.add_page()
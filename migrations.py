@@ -0,0 +1,62 @@
+from typing import Callable, List
+
+from sqlalchemy import MetaData, inspect
+from sqlalchemy.engine import Connection
+
+# -----------------------------------------------------------------------------
+# Versioned schema migrations (SQLite)
+# -----------------------------------------------------------------------------
+# The number of steps applied to a database is kept in PRAGMA user_version.
+# A new database is created from the models and starts at the latest version,
+# so startup on an up-to-date database costs a single PRAGMA read. Steps are
+# idempotent: workers starting at the same time may both run one.
+
+
+def _columns(conn: Connection, table: str) -> set:
+    return {row[1] for row in conn.exec_driver_sql(f'PRAGMA table_info({table})')}
+
+
+def _add_columns(conn: Connection, table: str, columns) -> None:
+    existing = _columns(conn, table)
+    for name, ddl_type in columns:
+        if name not in existing:
+            conn.exec_driver_sql(f'ALTER TABLE {table} ADD COLUMN {name} {ddl_type}')
+
+
+def _columns_before_versioning(conn: Connection) -> None:
+    """Columns init_db used to add with try/except ALTER TABLE on every start."""
+    _add_columns(conn, 'feeds', (('image_selector', 'VARCHAR(512)'),
+                                 ('refresh_interval', 'INTEGER'),
+                                 ('next_page_selector', 'VARCHAR(512)')))
+    _add_columns(conn, 'feed_snapshots', (('xml_gz', 'BLOB'),
+                                          ('etag', 'VARCHAR(64)'),
+                                          ('modified_at', 'DATETIME')))
+
+
+def _feed_url_index(conn: Connection) -> None:
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_feeds_url ON feeds (url)')
+
+
+# Append only; a step's position is its version
+MIGRATIONS: List[Callable[[Connection], None]] = [
+    _columns_before_versioning,
+    _feed_url_index,
+]
+
+
+def schema_version(conn: Connection) -> int:
+    return conn.exec_driver_sql('PRAGMA user_version').scalar()
+
+
+def migrate(conn: Connection, metadata: MetaData) -> int:
+    """Bring the database up to the latest version; returns the number of steps run."""
+    version = schema_version(conn)
+    if version >= len(MIGRATIONS):
+        return 0
+    steps = MIGRATIONS[version:] if inspect(conn).has_table('feeds') else []
+    # Tables added since (all of them for a new database), with their indexes
+    metadata.create_all(conn)
+    for step in steps:
+        step(conn)
+    conn.exec_driver_sql(f'PRAGMA user_version = {len(MIGRATIONS)}')
+    return len(steps)
@@ -0,0 +1,64 @@
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Callable, Dict, Iterable, List
+from xml.sax.saxutils import escape, quoteattr
+
+# -----------------------------------------------------------------------------
+# OPML 2.0 import / export of feed definitions
+# -----------------------------------------------------------------------------
+# Each feed is an ``outline`` with the usual type/text/xmlUrl/htmlUrl
+# attributes; its selectors and refresh interval are extra attributes named
+# after the Feed columns, so an export can be imported back unchanged.
+
+# Feed columns carried as outline attributes (besides the name and URL)
+OUTLINE_FIELDS = ('item_selector', 'title_selector', 'link_selector', 'content_selector', 'date_selector',
+                  'author_selector', 'image_selector', 'next_page_selector', 'refresh_interval')
+
+
+def write_opml(feeds: Iterable[Dict], feed_url: Callable[[Dict], str], title: str = 'Site2RSS feeds') -> str:
+    """OPML document for feed dicts (``Feed.as_dict()``); ``feed_url(feed)`` gives the RSS URL."""
+    parts = ["<?xml version='1.0' encoding='UTF-8'?>\n",
+             '<opml version="2.0">\n',
+             f'  <head>\n    <title>{escape(title)}</title>\n'
+             f'    <dateCreated>{format_datetime(datetime.now(timezone.utc))}</dateCreated>\n  </head>\n',
+             '  <body>\n']
+    for feed in feeds:
+        attrs = ['type="rss"', f'text={quoteattr(feed["name"])}', f'title={quoteattr(feed["name"])}',
+                 f'xmlUrl={quoteattr(feed_url(feed))}', f'htmlUrl={quoteattr(feed["url"])}']
+        attrs += [f'{field}={quoteattr(str(feed[field]))}' for field in OUTLINE_FIELDS if feed.get(field) is not None]
+        parts.append(f'    <outline {" ".join(attrs)}/>\n')
+    parts.append('  </body>\n</opml>\n')
+    return ''.join(parts)
+
+
+def read_opml(data: bytes) -> List[Dict]:
+    """Feed dicts (name, url and the ``OUTLINE_FIELDS`` present) from an OPML document.
+
+    Category outlines are walked into; outlines without a site URL are skipped.
+    Raises ValueError on malformed XML.
+    """
+    try:
+        root = ET.fromstring(data)
+    except ET.ParseError as e:
+        raise ValueError(f'Invalid OPML: {e}') from None
+    body = root.find('body')
+    if root.tag != 'opml' or body is None:
+        raise ValueError('Invalid OPML: no <opml><body>')
+
+    feeds = []
+    for outline in body.iter('outline'):
+        url = outline.get('htmlUrl')
+        if not url:
+            continue
+        feed = {'name': outline.get('title') or outline.get('text') or url, 'url': url}
+        for field in OUTLINE_FIELDS:
+            if outline.get(field):
+                feed[field] = outline.get(field)
+        if 'refresh_interval' in feed:
+            try:
+                feed['refresh_interval'] = int(feed['refresh_interval'])
+            except ValueError:
+                raise ValueError(f'Invalid refresh_interval for {url}') from None
+        feeds.append(feed)
+    return feeds
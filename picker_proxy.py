@@ -0,0 +1,124 @@
+import html
+import re
+from typing import AsyncIterator, Iterable, Iterator
+
+# -----------------------------------------------------------------------------
+# Streaming rewriter for pages shown in the picker iframe
+# -----------------------------------------------------------------------------
+
+# Scripts, embedded frames (ads, trackers, video players) and script preloads.
+# Comments match first and are kept as they are, so tags mentioned inside
+# them are left alone; a tag name must end at whitespace, '/' or '>'.
+_DROP = re.compile(
+    r'(<!--.*?-->)|<(script|iframe)(?=[\s/>])[^>]*>.*?</\2\s*>|<link(?=[\s/>])[^>]*\bas=["\']?script\b[^>]*>',
+    re.IGNORECASE | re.DOTALL,
+)
+# The first comment or dropped element whose end has not arrived yet
+_UNCLOSED = re.compile(r'<!--.*?-->|(<!--|<(?:script|iframe)(?=[\s/>]))', re.IGNORECASE | re.DOTALL)
+_DROPPED_START = re.compile(r'<(?:script|iframe)(?=[\s/>])', re.IGNORECASE)
+_HEAD = re.compile(r'<head\b[^>]*>', re.IGNORECASE)
+_IMG = re.compile(r'<img\b(?![^>]*\bloading=)', re.IGNORECASE)
+
+# Give up on <base> injection when no <head> shows up this early
+_HEAD_WINDOW = 64 * 1024
+
+
+def _keep_comment(match: re.Match) -> str:
+    return match.group(1) or ''
+
+
+class PickerRewriter:
+    """Rewrites a page chunk by chunk for the picker iframe.
+
+    A ``<base>`` tag is injected so relative assets resolve against the
+    origin, images load lazily and, with ``strip_scripts``, scripts and
+    iframes are removed; the picker works on the DOM and needs neither. Text
+    that might still be part of an unfinished tag is held back until the next
+    chunk, and output stops after ``max_chars`` characters of input.
+    """
+
+    def __init__(self, base_url: str, strip_scripts: bool = True, max_chars: int = 5 * 1024 * 1024):
+        self.base_tag = f'<base href="{html.escape(base_url, quote=True)}">'
+        self.strip_scripts = strip_scripts
+        self.max_chars = max_chars
+        self.consumed = 0
+        self._emitted = 0
+        self._head_done = False
+        self._pending = ''
+
+    @property
+    def exhausted(self) -> bool:
+        return self.consumed >= self.max_chars
+
+    def feed(self, text: str) -> str:
+        text = text[:self.max_chars - self.consumed]
+        self.consumed += len(text)
+        text = self._pending + text
+        self._pending = ''
+        held = -1
+        if self.strip_scripts:
+            text = _DROP.sub(_keep_comment, text)
+            for match in _UNCLOSED.finditer(text):
+                if match.group(1):
+                    held = match.start()
+                    break
+        if held == -1:
+            lt = text.rfind('<')
+            if lt != -1 and '>' not in text[lt:]:
+                held = lt
+        if held != -1:
+            text, self._pending = text[:held], text[held:]
+        return self._rewrite(text)
+
+    def close(self) -> str:
+        """Flush held-back text; an element to drop that never ended is discarded."""
+        text, self._pending = self._pending, ''
+        if self.strip_scripts and _DROPPED_START.match(text):
+            return ''
+        return self._rewrite(text)
+
+    def truncated(self) -> str:
+        return self.close() + '\n<!-- truncated by the Site2RSS picker proxy -->'
+
+    def _rewrite(self, text: str) -> str:
+        if not self._head_done:
+            head = _HEAD.search(text)
+            if head:
+                text = text[:head.end()] + self.base_tag + text[head.end():]
+                self._head_done = True
+            elif self._emitted + len(text) > _HEAD_WINDOW:
+                self._head_done = True
+        text = _IMG.sub('<img loading="lazy"', text)
+        self._emitted += len(text)
+        return text
+
+    def rewrite(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Rewrite a chunk iterator; the source is closed when this generator is."""
+        try:
+            for chunk in chunks:
+                out = self.feed(chunk)
+                if out:
+                    yield out
+                if self.exhausted:
+                    yield self.truncated()
+                    return
+            yield self.close()
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close:
+                close()
+
+    async def rewrite_async(self, chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+        try:
+            async for chunk in chunks:
+                out = self.feed(chunk)
+                if out:
+                    yield out
+                if self.exhausted:
+                    yield self.truncated()
+                    return
+            yield self.close()
+        finally:
+            aclose = getattr(chunks, 'aclose', None)
+            if aclose:
+                await aclose()
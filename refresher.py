@@ -0,0 +1,161 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set
+
+from scraper import fetch_html, fetch_timeout, parse_items, enrich_items, crawl_pages
+
+# -----------------------------------------------------------------------------
+# Background feed refresher
+# -----------------------------------------------------------------------------
+
+
+class FeedRefresher:
+    """Periodically rebuild feeds that are due, on a small pool of worker threads.
+
+    The refresher knows nothing about the database: ``due_feed_ids`` returns the
+    ids that should be rebuilt now and ``refresh_feed`` rebuilds a single feed.
+    Both are called inside an application context.
+    """
+
+    def __init__(self, app, due_feed_ids: Callable[[], Iterable[int]],
+                 refresh_feed: Callable[[int], None],
+                 poll_interval: float = 30, max_workers: int = 4):
+        self.app = app
+        self.due_feed_ids = due_feed_ids
+        self.refresh_feed = refresh_feed
+        self.poll_interval = poll_interval
+        self.max_workers = max_workers
+
+        self._lock = threading.Lock()
+        self._pending: Set[int] = set()
+        self._stop = threading.Event()
+        self._thread = None
+        self._executor = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            self._stop.clear()
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='feed-refresh')
+            self._thread = threading.Thread(target=self._run, name='feed-refresher', daemon=True)
+            self._thread.start()
+
+    def stop(self, wait: bool = True):
+        self._stop.set()
+        if self._thread is not None and wait:
+            self._thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+        self._thread = None
+        self._executor = None
+
+    def request_refresh(self, feed_id: int) -> bool:
+        """Queue a refresh of ``feed_id`` unless one is already pending."""
+        with self._lock:
+            if feed_id in self._pending or self._executor is None:
+                return False
+            self._pending.add(feed_id)
+            self._executor.submit(self._refresh, feed_id)
+        return True
+
+    def _refresh(self, feed_id: int):
+        try:
+            with self.app.app_context():
+                self.refresh_feed(feed_id)
+        except Exception as e:
+            print("Refresh failed for feed", feed_id, ":", e)
+        finally:
+            with self._lock:
+                self._pending.discard(feed_id)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    due = list(self.due_feed_ids())
+                for feed_id in due:
+                    self.request_refresh(feed_id)
+            except Exception as e:
+                print("Refresh scheduler error", e)
+            self._stop.wait(self.poll_interval)
+
+
+# -----------------------------------------------------------------------------
+# Batch refresh (flask refresh-feeds)
+# -----------------------------------------------------------------------------
+
+
+class RefreshJob(NamedTuple):
+    feed_id: int
+    url: str
+    mapping: Dict[str, str]
+    seen: Optional[Callable[[str], bool]] = None  # item already stored? (stops pagination)
+
+
+class ScrapeResult(NamedTuple):
+    job: RefreshJob
+    items: Optional[List[Dict]]  # None when the feed failed
+    error: Optional[str]
+    timings: Dict[str, float]    # seconds spent per stage
+
+
+def _scrape(job: RefreshJob, parse_pool, limit: int, timeout: float, timings: Dict[str, float]):
+    deadline = time.monotonic() + timeout
+
+    def on_pool(fn, *args):
+        # TimeoutError once the deadline passes, like the fetches
+        return parse_pool.submit(fn, *args).result(timeout=max(deadline - time.monotonic(), 0))
+
+    start = time.perf_counter()
+    html = fetch_html(job.url, fetch_timeout(deadline))
+    timings['fetch'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    items = on_pool(parse_items, html, job.url, job.mapping, limit)
+    timings['parse'] = time.perf_counter() - start
+
+    # Further listing pages, when the first one had fewer than ``limit`` items;
+    # stops at the deadline with the items found so far
+    start = time.perf_counter()
+    crawl_pages(job.url, html, job.mapping, items, limit, job.seen, parse=on_pool, deadline=deadline)
+    timings['fetch'] += time.perf_counter() - start
+
+    # Items whose article page misses the deadline are kept as they are
+    start = time.perf_counter()
+    enrich_items(items, parse=on_pool, deadline=deadline)
+    timings['enrich'] = time.perf_counter() - start
+    return items
+
+
+def scrape_batch(jobs: Iterable[RefreshJob], limit: int, workers: Optional[int] = None,
+                 fetchers: int = 8, timeout: float = 60.0) -> Iterator[ScrapeResult]:
+    """Scrape many feeds, yielding results as each one finishes.
+
+    Fetching and article enrichment run on ``fetchers`` threads while HTML
+    parsing, which is CPU bound, runs on a pool of ``workers`` processes so it
+    scales past the GIL. A feed that fails or exceeds ``timeout`` seconds only
+    produces a failed result.
+    """
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as parse_pool, \
+            ThreadPoolExecutor(max_workers=fetchers, thread_name_prefix='refresh-io') as io_pool:
+        futures = {}
+        for job in jobs:
+            timings: Dict[str, float] = {}
+            future = io_pool.submit(_scrape, job, parse_pool, limit, timeout, timings)
+            futures[future] = (job, timings)
+
+        for future in as_completed(futures):
+            job, timings = futures[future]
+            try:
+                yield ScrapeResult(job, future.result(), None, timings)
+            except Exception as e:
+                yield ScrapeResult(job, None, str(e) or type(e).__name__, timings)
@@ -1,44 +1,67 @@
-from typing import Dict
-from datetime import timezone
-from dateutil import parser as dateparser
-import mimetypes
-
-from feedgen.feed import FeedGenerator
+from typing import Dict, List
+import gzip
+import hashlib
+import json
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 
+import feed_writer
+import metrics
 from scraper import extract_items_with_mapping
 
 
+def items_digest(items: List[Dict]) -> str:
+    """Stable hash of an item list, used as the feed's ETag."""
+    payload = json.dumps(items, sort_keys=True, default=_json_default).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()[:32]
+
+
+# Query parameters that only track the visit and never change the article
+_TRACKING_PARAMS = ('utm_', 'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'ref')
+
+
+def normalize_link(link: str) -> str:
+    """Canonical form of an item link: lowercase scheme/host, no fragment or tracking params."""
+    parts = urlsplit(link.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if not k.lower().startswith(_TRACKING_PARAMS)]
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ''))
+
+
+def item_key(link: str) -> str:
+    """Fixed-size key identifying an item within its feed."""
+    return hashlib.sha256(normalize_link(link).encode('utf-8')).hexdigest()[:40]
+
+
+def content_hash(item: Dict) -> str:
+    """Hash of the fields that make an item worth rewriting when they change."""
+    fields = [item.get(k) for k in ('title', 'link', 'content', 'date', 'author', 'image')]
+    payload = json.dumps(fields, default=_json_default)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def _json_default(value):
+    # datetimes hash the same as the ISO strings the scraper returns
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def compress(xml: bytes) -> bytes:
+    """gzip a rendered feed once so it can be served to every reader that accepts it."""
+    return gzip.compress(xml, compresslevel=9, mtime=0)
+
+
 def generate_rss(feed_model, mapping: Dict[str, str]) -> bytes:
     """Generate RSS XML string for a given Feed SQLAlchemy model."""
     items = extract_items_with_mapping(feed_model.url, mapping, limit=50)
+    return render_rss(feed_model, items)
+
+
+def render_rss(feed_model, items: List[Dict]) -> bytes:
+    """Serialize already extracted items as RSS 2.0."""
+    return render_feed('xml', feed_model, items)
+
 
-    fg = FeedGenerator()
-    fg.id(str(feed_model.id))
-    fg.title(feed_model.name or feed_model.url)
-    fg.link(href=feed_model.url, rel='alternate')
-    fg.description(f"RSS feed generated from {feed_model.url}")
-
-    for itm in items:
-        fe = fg.add_entry()
-        fe.title(itm['title'])
-        fe.link(href=itm['link'])
-        if itm.get('date'):
-            try:
-                dt = dateparser.parse(itm['date']) if isinstance(itm['date'], str) else itm['date']
-                if dt and dt.tzinfo is None:
-                    dt = dt.replace(tzinfo=timezone.utc)
-                fe.pubDate(dt)
-            except Exception:
-                # ignore date parsing errors
-                pass
-        if itm.get('author'):
-            fe.author({'name': itm['author']})
-        if itm.get('content'):
-            fe.description(itm['content'])
-        if itm.get('image'):
-            img_url = itm['image']
-            # Try to guess mime type
-            mime = mimetypes.guess_type(img_url)[0] or 'image/jpeg'
-            fe.enclosure(img_url, 0, mime)
-
-    return fg.rss_str(pretty=True) 
\ No newline at end of file
+def render_feed(fmt: str, feed_model, items: List[Dict], **options) -> bytes:
+    """Serialize items as RSS ('xml'), Atom ('atom') or JSON Feed ('json')."""
+    with metrics.stage('serialize', urlsplit(feed_model.url).netloc):
+        return feed_writer.render(fmt, feed_model, items, **options)
@@ -1,49 +1,286 @@
+import asyncio
+import codecs
+import contextvars
+import json
+import os
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from html import unescape
 from urllib.parse import urljoin
 from datetime import datetime
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator, AsyncIterator, Callable, Generator
 
-import requests
 from bs4 import BeautifulSoup, NavigableString, Tag
-from dateutil import parser as dateparser
 
-# Try to import google-genai for LLM support
+from fetcher import default_fetcher, default_async_fetcher
+from http_cache import HttpCache, CachedPage
+from detection_cache import DetectionCache, page_fingerprint
+from dates import parse_date
+from html_reduce import reduce_html
+from heuristics import detect_mapping, detection_window, parse_for_detection
+from selector_plan import plan_for, parse_page
+from singleflight import SingleFlight, LOCK_DIR
+from memory_cache import MemoryCache
+import metrics
+
+# Settings (GEMINI_API_KEY, ...) may come from a .env file
 try:
-    from google import genai
     from dotenv import load_dotenv
-    import json, os
-
     load_dotenv()
-    _GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-    _gemini_client = genai.Client(api_key=_GEMINI_API_KEY) if _GEMINI_API_KEY else None
-    # Choose model
-    _GEMINI_MODEL = "gemini-2.0-flash"  # default, can be overridden later
-except Exception:
-    _gemini_client = None
+except ImportError:
+    pass
+
+# -----------------------------------------------------------------------------
+# Gemini client
+# -----------------------------------------------------------------------------
+# google-genai takes about half a second to import, so it is imported (and the
+# client created) on the first LLM call rather than when workers boot.
+
+_GEMINI_MODEL = "gemini-2.0-flash"  # default, can be overridden later
+
+_UNLOADED = object()
+_gemini_client = _UNLOADED  # None: no LLM (no API key or google-genai missing)
+_gemini_lock = threading.Lock()
+
+
+def gemini_client():
+    """The shared genai client, or None when LLM support is unavailable."""
+    global _gemini_client
+    if _gemini_client is _UNLOADED:
+        with _gemini_lock:
+            if _gemini_client is _UNLOADED:
+                client = None
+                api_key = os.getenv('GEMINI_API_KEY')
+                if api_key:
+                    try:
+                        from google import genai
+                        client = genai.Client(api_key=api_key)
+                    except Exception as e:
+                        print("Gemini client unavailable:", e)
+                _gemini_client = client
+    return _gemini_client
 
 # -----------------------------------------------------------------------------
 # Helper functions
 # -----------------------------------------------------------------------------
 
-# Simple in-memory cache for downloaded HTML to avoid repeated network calls in a single run
-_HTML_CACHE: Dict[str, str] = {}
+# Pages younger than this are served from cache without contacting the origin;
+# older ones are revalidated with If-None-Match / If-Modified-Since.
+HTML_CACHE_TTL = int(os.getenv('HTML_CACHE_TTL', 60))
+
+# Persistent page cache shared by restarts and worker processes
+_PAGE_CACHE = HttpCache(
+    os.getenv('HTTP_CACHE_PATH', os.path.join(os.path.abspath(os.path.dirname(__file__)), 'http_cache.db')),
+    max_age=int(os.getenv('HTTP_CACHE_MAX_AGE', 7 * 24 * 3600)),
+)
+
+# Detected selectors, shared by restarts and worker processes
+_DETECTIONS = DetectionCache(
+    os.getenv('DETECTION_CACHE_PATH',
+              os.path.join(os.path.abspath(os.path.dirname(__file__)), 'detection_cache.db')),
+    ttl=int(os.getenv('DETECTION_CACHE_TTL', 7 * 24 * 3600)),
+)
+
+# In-memory front for the page cache, bounded by size; pages expire when they stop being fresh
+PAGE_MEMORY_CACHE = MemoryCache(
+    int(os.getenv('PAGE_MEMORY_CACHE_BYTES', 64 * 1024 * 1024)),
+    compress=os.getenv('PAGE_MEMORY_CACHE_COMPRESS', '0') == '1',
+    name='pages',
+)
+
+
+def _remember(page: CachedPage) -> None:
+    PAGE_MEMORY_CACHE.set(page.url, page, ttl=HTML_CACHE_TTL - (time.time() - page.fetched_at))
+
+
+# Concurrent fetches of one URL share a request, across threads and worker processes
+_PAGE_FLIGHTS = SingleFlight(os.path.join(LOCK_DIR, 'pages'), stripes=256)
+
+
+def _cached_page(url: str) -> Tuple[Optional[CachedPage], bool]:
+    """Return the cached page (if any) and whether it is still fresh."""
+    cached = PAGE_MEMORY_CACHE.get(url)
+    if cached is None or time.time() - cached.fetched_at >= HTML_CACHE_TTL:
+        # Another worker process may have refetched it
+        cached = _PAGE_CACHE.get(url) or cached
+    if cached and time.time() - cached.fetched_at < HTML_CACHE_TTL:
+        _remember(cached)
+        return cached, True
+    return cached, False
+
+
+def _request_headers(cached: Optional[CachedPage]) -> Dict[str, str]:
+    headers = {'User-Agent': 'Mozilla/5.0 (compatible; kagi-rss-generator/1.0)'}
+    if cached:
+        if cached.etag:
+            headers['If-None-Match'] = cached.etag
+        if cached.last_modified:
+            headers['If-Modified-Since'] = cached.last_modified
+    return headers
+
+
+def _request(url: str, cached: Optional[CachedPage], timeout: int, stream: bool = False):
+    return default_fetcher.get(url, timeout=timeout, headers=_request_headers(cached), stream=stream)
+
+
+def _revalidated(cached: CachedPage) -> str:
+    _PAGE_CACHE.touch(cached.url)
+    _remember(cached._replace(fetched_at=time.time()))
+    return cached.body
+
+
+def _store(url: str, resp, html: str) -> None:
+    _remember(_PAGE_CACHE.put(url, html, resp.headers.get('ETag'), resp.headers.get('Last-Modified')))
+
+
+def _cache_result(url: str, result: str) -> None:
+    metrics.PAGE_CACHE.inc(host=_host(url), result=result)
+
 
 def fetch_html(url: str, timeout: int = 10, use_cache: bool = True) -> str:
-    if use_cache and url in _HTML_CACHE:
-        return _HTML_CACHE[url]
-    resp = requests.get(url, timeout=timeout, headers={
-        'User-Agent': 'Mozilla/5.0 (compatible; kagi-rss-generator/1.0)'
-    })
-    resp.raise_for_status()
-    html = resp.text
+    """Fetch a page through the page cache; concurrent callers for one URL share the request."""
     if use_cache:
-        # naive cache, keep up to 200 pages
-        if len(_HTML_CACHE) > 200:
-            _HTML_CACHE.clear()
-        _HTML_CACHE[url] = html
+        cached, fresh = _cached_page(url)
+        if fresh:
+            _cache_result(url, 'hit')
+            return cached.body
+    # Waiting on a leader is bounded too: it may be an async stream whose parsing
+    # needs the worker thread this call is blocking
+    html = _PAGE_FLIGHTS.do(url, _fetch_html, url, timeout, use_cache, wait_timeout=timeout)
+    while html is None:
+        # Joined a stream_html that stopped before the end of the body
+        html = _PAGE_FLIGHTS.do(url, _fetch_html, url, timeout, use_cache, wait_timeout=timeout)
     return html
 
 
+def _fetch_html(url: str, timeout: int, use_cache: bool) -> str:
+    cached = None
+    if use_cache:
+        # The leader in another process may have just stored it
+        cached, fresh = _cached_page(url)
+        if fresh:
+            _cache_result(url, 'hit')
+            return cached.body
+
+    with metrics.stage('fetch', _host(url)):
+        resp = _request(url, cached, timeout)
+        metrics.page_fetched(_host(url), resp.status_code)
+        if cached and resp.status_code == 304:
+            _cache_result(url, 'revalidated')
+            return _revalidated(cached)
+        if use_cache:
+            _cache_result(url, 'miss')
+        resp.raise_for_status()
+        html = resp.text
+    if use_cache:
+        _store(url, resp, html)
+    return html
+
+
+# Size of the decoded pieces yielded by stream_html
+STREAM_CHUNK = 64 * 1024
+
+
+def stream_html(url: str, timeout: int = 10, raise_for_status: bool = True) -> Iterator[str]:
+    """Yield a page as decoded text chunks, reading the network only as far as the consumer does.
+
+    Cached pages are yielded in slices too, so early-exit parsing also applies to
+    them. A body is stored in the page cache only if it was read to the end.
+    Without ``raise_for_status`` error pages are yielded too (and not cached).
+
+    Shares ``fetch_html``'s per-URL single-flight: while another fetch of the
+    URL runs, the page is taken from it instead of being requested again, and
+    ``fetch_html`` callers arriving during the stream wait for its body. The
+    stripe's file lock is held for the whole stream, so other processes wait
+    too; when the consumer stops early only waiters in this process get the
+    rest of the body, and another process then fetches the page itself.
+    """
+    cached, fresh = _cached_page(url)
+    if fresh:
+        _cache_result(url, 'hit')
+        yield from _slices(cached.body)
+        return
+
+    call = _PAGE_FLIGHTS.start(url) if raise_for_status else None
+    if raise_for_status and call is None:
+        yield from _slices(fetch_html(url, timeout))
+        return
+    # Held for the whole stream, so leaders in other processes wait for it as for fetch_html
+    lock = _PAGE_FLIGHTS.file_lock(url) if call is not None else None
+    body = error = None
+    try:
+        if lock is not None:
+            lock.acquire()
+            cached, fresh = _cached_page(url)
+            if fresh:
+                # The leader in another process has just stored it
+                _cache_result(url, 'hit')
+                body = cached.body
+                yield from _slices(body)
+                return
+        body = yield from _stream_response(url, cached, timeout, raise_for_status,
+                                           lambda: call is not None and call.waiters > 0)
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        if lock is not None:
+            lock.release()
+        if call is not None:
+            # None (stopped early) makes waiting fetch_html callers fetch it themselves
+            _PAGE_FLIGHTS.finish(url, call, body, error)
+
+
+def _stream_response(url: str, cached: Optional[CachedPage], timeout: int, raise_for_status: bool,
+                     wanted: Callable[[], bool]) -> Generator[str, None, Optional[str]]:
+    """stream_html's network part; returns the whole body if it was read to the end and cached.
+
+    If the consumer stops early while ``wanted()`` (other callers wait for the
+    page), the rest is still read and cached for them.
+    """
+    # Only the time to response headers; the body is read as the consumer parses
+    with metrics.stage('fetch', _host(url)):
+        resp = _request(url, cached, timeout, stream=True)
+    metrics.page_fetched(_host(url), resp.status_code)
+    with closing(resp):
+        if cached and resp.status_code == 304:
+            _cache_result(url, 'revalidated')
+            body = _revalidated(cached)
+            yield from _slices(body)
+            return body
+        _cache_result(url, 'miss')
+        if raise_for_status:
+            resp.raise_for_status()
+        decoder = codecs.getincrementaldecoder(resp.encoding or 'utf-8')(errors='replace')
+        parts = []
+        try:
+            for raw in resp.iter_content(STREAM_CHUNK):
+                text = decoder.decode(raw)
+                parts.append(text)
+                yield text
+        except GeneratorExit:
+            if resp.ok and wanted():
+                parts.extend(decoder.decode(raw) for raw in resp.iter_content(STREAM_CHUNK))
+                parts.append(decoder.decode(b'', final=True))
+                _store(url, resp, ''.join(parts))
+            raise
+        parts.append(decoder.decode(b'', final=True))
+        yield parts[-1]
+        if not resp.ok:
+            return None
+        body = ''.join(parts)
+        _store(url, resp, body)
+        return body
+
+
+def _slices(text: str) -> Iterator[str]:
+    for start in range(0, len(text), STREAM_CHUNK):
+        yield text[start:start + STREAM_CHUNK]
+
+
 def find_candidate_item_selector(soup: BeautifulSoup) -> str:
     """Return a CSS selector string that identifies repeating content items."""
     # Common container selectors to test in order
@@ -77,11 +314,11 @@ def text_of(el: Tag) -> str:
     return ' '.join(el.stripped_strings)
 
 
-def parse_date(text: str):
-    try:
-        return dateparser.parse(text, fuzzy=True)
-    except Exception:
-        return None
+def date_text_of(el: Tag) -> str:
+    """Machine-readable ``datetime`` (``<time>``) or ``content`` (``<meta>``) attribute, else the text."""
+    if not el:
+        return ''
+    return el.get('datetime') or el.get('content') or text_of(el)
 
 # -----------------------------------------------------------------------------
 # LLM-powered selector detection
@@ -96,24 +333,62 @@ def _strip_code(text: str) -> str:
     return text.strip()
 
 
-def _mapping_is_valid(url: str, mapping: Dict[str, str]) -> bool:
+def _prompt_html(url: str, html: str) -> str:
+    """Reduce a page to the DOM skeleton sent to the model."""
+    reduced = reduce_html(html)
+    print("Reduced HTML for", url, ":", reduced.original_chars, "->", reduced.reduced_chars,
+          "chars (x%.1f)" % reduced.ratio)
+    return reduced.html
+
+
+def _mapping_is_valid(url: str, mapping: Dict[str, str], soup: BeautifulSoup) -> bool:
+    """True if the mapping extracts an item from the page (``soup``, already parsed)."""
     essential = ['item_selector', 'title_selector', 'link_selector']
     if not all(k in mapping and isinstance(mapping[k], str) and mapping[k].strip() for k in essential):
         return False
     # quick sanity by extracting 1 item
     try:
-        items = extract_items_with_mapping(url, mapping, limit=1)
-        return len(items) > 0
+        plan = plan_for(mapping)
+        return len(_items_from(plan, plan.items(soup), url, 1)) > 0
     except Exception:
         return False
 
 
-def llm_detect_selectors(url: str, html: str) -> Optional[Dict[str, str]]:
-    """Use Gemini chat to iteratively get selectors. Returns mapping or None."""
-    if not _gemini_client:
+def _llm_call(kind: str, url: str, fn, *args, **kwargs):
+    """Run one Gemini request, recording its latency and outcome."""
+    with metrics.stage('llm', _host(url)):
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            metrics.LLM_CALLS.inc(kind=kind, result='error')
+            raise
+    metrics.LLM_CALLS.inc(kind=kind, result='ok')
+    return result
+
+
+def llm_detect_selectors(url: str, html: str, soup: Optional[BeautifulSoup] = None) -> Optional[Dict[str, str]]:
+    """Use Gemini chat to iteratively get selectors. Returns mapping or None.
+
+    Results are cached per host and page structure; a cached mapping that no
+    longer extracts an item is dropped and detected again. ``soup`` is the
+    page from ``parse_for_detection``.
+    """
+    client = gemini_client()
+    if not client:
         return None
 
-    snippet = html[:50000]
+    if soup is None:
+        soup = parse_for_detection(html)
+    cache_key = DetectionCache.key('listing', _host(url), page_fingerprint(html, soup))
+    cached = _DETECTIONS.get(cache_key)
+    metrics.DETECTION_CACHE.inc(kind='listing', result='miss' if cached is None else 'hit')
+    if cached is not None:
+        if _mapping_is_valid(url, cached, soup):
+            return cached
+        _DETECTIONS.delete(cache_key)
+
+    # reduce_html rewrites the tree it parses, and ``soup`` is still needed to check the answers
+    snippet = _prompt_html(url, detection_window(html))
     base_prompt = (
         "You are an expert web scraper and will help build an RSS feed. "
         "Given the HTML of a web page that lists articles, extract CSS selectors needed to build the feed.\n\n"
@@ -132,10 +407,10 @@ def llm_detect_selectors(url: str, html: str) -> Optional[Dict[str, str]]:
         "Never wrap the JSON in code fences."
     )
 
-    chat = _gemini_client.chats.create(model=_GEMINI_MODEL)
+    chat = client.chats.create(model=_GEMINI_MODEL)
 
     # First request
-    chat.send_message(base_prompt + "\n\nHTML:\n" + snippet)
+    _llm_call('listing', url, chat.send_message, base_prompt + "\n\nHTML:\n" + snippet)
 
     for attempt in range(3):
         response = chat.get_history()[-1]  # latest assistant response
@@ -146,8 +421,9 @@ def llm_detect_selectors(url: str, html: str) -> Optional[Dict[str, str]]:
         except Exception:
             mapping = {}
 
-        if mapping and mapping.get('result') == 'success' and _mapping_is_valid(url, mapping):
+        if mapping and mapping.get('result') == 'success' and _mapping_is_valid(url, mapping, soup):
             mapping.pop('result', None)
+            _DETECTIONS.put(cache_key, mapping)
             return mapping
 
         # Compose feedback
@@ -155,7 +431,7 @@ def llm_detect_selectors(url: str, html: str) -> Optional[Dict[str, str]]:
             "Your previous JSON was incomplete or did not work for extracting items. "
             "Please try again and output corrected JSON only."
         )
-        chat.send_message(feedback)
+        _llm_call('listing', url, chat.send_message, feedback)
 
     return None
 
@@ -163,19 +439,33 @@ def llm_detect_selectors(url: str, html: str) -> Optional[Dict[str, str]]:
 # Article-level selector detection (for date/author/content inside article page)
 # -----------------------------------------------------------------------------
 
-ARTICLE_SELECTOR_CACHE: Dict[str, Dict[str, str]] = {}
+# Article field selectors per host
+ARTICLE_SELECTOR_CACHE = MemoryCache(
+    int(os.getenv('ARTICLE_SELECTOR_CACHE_BYTES', 1024 * 1024)),
+    ttl=int(os.getenv('ARTICLE_SELECTOR_CACHE_TTL', 24 * 3600)),
+    name='article_selectors',
+)
 
 
 def llm_detect_article_fields(url: str, html: str) -> Optional[Dict[str, str]]:
     """Ask Gemini for selectors (relative to full article HTML) for missing fields."""
-    if not _gemini_client:
+    client = gemini_client()
+    if not client:
         return None
 
     host = url.split('/')[2]
-    if host in ARTICLE_SELECTOR_CACHE:
-        return ARTICLE_SELECTOR_CACHE[host]
+    known = ARTICLE_SELECTOR_CACHE.get(host)
+    if known is not None:
+        return known
+
+    cache_key = DetectionCache.key('article', host, page_fingerprint(html))
+    cached = _DETECTIONS.get(cache_key)
+    metrics.DETECTION_CACHE.inc(kind='article', result='miss' if cached is None else 'hit')
+    if cached is not None:
+        ARTICLE_SELECTOR_CACHE.set(host, cached)
+        return cached
 
-    snippet = html[:50000]
+    snippet = _prompt_html(url, html)
     prompt = (
         "You are an expert web scraper. Given the HTML of a single article, "
         "return CSS selectors (not XPath) that locate the publication date, author name, and main content text.\n\n"
@@ -191,10 +481,12 @@ def llm_detect_article_fields(url: str, html: str) -> Optional[Dict[str, str]]:
     )
 
     try:
-        response = _gemini_client.models.generate_content(
+        from google.genai import types
+        response = _llm_call(
+            'article', url, client.models.generate_content,
             model=_GEMINI_MODEL,
             contents=[prompt],
-            config=genai.types.GenerateContentConfig(
+            config=types.GenerateContentConfig(
                 max_output_tokens=1024,
                 temperature=0.1
             )
@@ -202,24 +494,148 @@ def llm_detect_article_fields(url: str, html: str) -> Optional[Dict[str, str]]:
         text = _strip_code(response.text)
         print("Gemini article field response for", host, ":", text[:400])
         data = json.loads(text)
-        ARTICLE_SELECTOR_CACHE[host] = data
+        ARTICLE_SELECTOR_CACHE.set(host, data)
+        _DETECTIONS.put(cache_key, data)
         return data
     except Exception as e:
         print("Article field LLM error", e)
         return None
 
+# -----------------------------------------------------------------------------
+# Article enrichment (fills fields missing on the listing page)
+# -----------------------------------------------------------------------------
+
+# Article pages fetched in parallel per extraction, and at most this many per host
+ARTICLE_FETCH_WORKERS = int(os.getenv('ARTICLE_FETCH_WORKERS', 8))
+ARTICLE_FETCH_PER_HOST = int(os.getenv('ARTICLE_FETCH_PER_HOST', 4))
+
+
+def _host(url: str) -> str:
+    return url.split('/')[2]
+
+
+def image_url_of(el: Optional[Tag], base_url: str) -> Optional[str]:
+    if el:
+        if el.name == 'img' and el.has_attr('src'):
+            return urljoin(base_url, el['src'])
+        elif el.has_attr('content'):
+            return urljoin(base_url, el['content'])
+    return None
+
+
+def _needs_article(item: Dict) -> bool:
+    return not item['date'] or not item['author'] or not item['content'] or not item['image']
+
+
+def _call(fn, *args):
+    return fn(*args)
+
+
+def fetch_timeout(deadline: Optional[float], default: float = 10) -> float:
+    """Timeout for a fetch that must end by ``deadline`` (``time.monotonic()``, None: no deadline).
+
+    Raises TimeoutError once the deadline has passed.
+    """
+    if deadline is None:
+        return default
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("deadline passed")
+    return min(default, remaining)
+
+
+def _article_selectors(links: List[str], deadline: Optional[float] = None) -> Dict[str, Dict[str, str]]:
+    """Resolve article selectors per host, asking the LLM once for each unknown host."""
+    selectors: Dict[str, Dict[str, str]] = {}
+    for link in links:
+        host = _host(link)
+        if host in selectors:
+            continue
+        extra = ARTICLE_SELECTOR_CACHE.get(host)
+        if extra is None and gemini_client():
+            try:
+                extra = llm_detect_article_fields(link, fetch_html(link, fetch_timeout(deadline)))
+            except Exception as e:
+                print("Article fetch error", link, e)
+        selectors[host] = extra or {}
+    return selectors
+
+
+def article_fields(html: str, selectors: Dict[str, str], link: str, fields: Iterable[str]) -> Dict:
+    """The requested fields (date, author, content, image) found on an article page."""
+    plan = plan_for(selectors)
+    art_soup = parse_page(html)
+    found = {}
+    for field in fields:
+        el = plan.select(art_soup, field)
+        if field == 'date':
+            found['date'] = parse_date(date_text_of(el), _host(link))
+        elif field == 'image':
+            found['image'] = image_url_of(el, link)
+        else:
+            found[field] = text_of(el)
+    return found
+
+
+def _fill_from_article(item: Dict, html: str, selectors: Dict[str, str], parse=_call) -> None:
+    missing = [field for field in ('date', 'author', 'content', 'image') if not item[field]]
+    item.update(parse(article_fields, html, selectors, item['link'], missing))
+
+
+def enrich_items(items: List[Dict], parse: Callable = _call, deadline: Optional[float] = None) -> None:
+    """Fetch article pages for items with missing fields and fill them in place.
+
+    Pages are fetched on a thread pool bounded by ARTICLE_FETCH_WORKERS overall
+    and ARTICLE_FETCH_PER_HOST per origin; a failing page only leaves its own
+    item incomplete. ``parse(fn, *args)`` runs the page parsing (e.g. on a
+    process pool); pages not fetched by ``deadline`` are skipped.
+    """
+    pending = [item for item in items if _needs_article(item)]
+    if not pending:
+        return
+    selectors = _article_selectors([item['link'] for item in pending], deadline)
+    pending = [item for item in pending if selectors[_host(item['link'])]]
+    if not pending:
+        return
+
+    host_slots = {host: threading.Semaphore(ARTICLE_FETCH_PER_HOST) for host in selectors}
+
+    def work(item):
+        host = _host(item['link'])
+        with host_slots[host]:
+            html = fetch_html(item['link'], fetch_timeout(deadline))
+        _fill_from_article(item, html, selectors[host], parse)
+
+    with metrics.stage('enrich', _host(pending[0]['link'])), \
+            ThreadPoolExecutor(max_workers=min(ARTICLE_FETCH_WORKERS, len(pending))) as pool:
+        # Each task runs in a copy of this context so its stages count towards the caller
+        futures = [pool.submit(contextvars.copy_context().run, work, item) for item in pending]
+        for item, future in zip(pending, futures):
+            try:
+                future.result()
+            except Exception as e:
+                print("Article enrichment error", item['link'], e)
+
 # -----------------------------------------------------------------------------
 # Public API
 # -----------------------------------------------------------------------------
 
-def auto_detect(url: str) -> Tuple[Dict[str, str], List[Dict]]:
-    """Detect selectors using LLM; fallback to heuristics."""
-    html = fetch_html(url)
+def detect_selectors(url: str, html: str) -> Dict[str, str]:
+    """Detect selectors locally; ask the LLM only when the local result is not confident.
 
-    mapping = llm_detect_selectors(url, html)
+    The page is parsed once (its detection window) and shared by every step.
+    """
+    soup = parse_for_detection(html)
+    detection = detect_mapping(html, soup)
+    mapping = None
+    if detection and detection.confident and _mapping_is_valid(url, detection.mapping, soup):
+        mapping = dict(detection.mapping)
+    if mapping is None:
+        mapping = llm_detect_selectors(url, html, soup)
+    if mapping is None and detection:
+        mapping = dict(detection.mapping)
     if mapping is None:
         # Fallback heuristic
-        soup = BeautifulSoup(html, 'html.parser')
         item_selector = find_candidate_item_selector(soup)
         mapping = {
             'item_selector': item_selector,
@@ -233,83 +649,559 @@ def auto_detect(url: str) -> Tuple[Dict[str, str], List[Dict]]:
 
     # Remove potential 'result' key if present
     mapping.pop('result', None)
+    return mapping
+
+
+def auto_detect(url: str) -> Tuple[Dict[str, str], List[Dict]]:
+    """Detect selectors for ``url`` and extract a few preview items with them."""
+    mapping = detect_selectors(url, fetch_html(url))
     items = extract_items_with_mapping(url, mapping, limit=5)
-    return mapping, items
+    return mapping, dates_to_iso(items)
 
 
-def extract_items_with_mapping(base_url: str, mapping: Dict[str, str], limit: int = 20) -> List[Dict]:
-    html = fetch_html(base_url)
-    soup = BeautifulSoup(html, 'html.parser')
-    item_selector = mapping.get('item_selector') or 'article'
+def _items_from(plan, elements: Iterable[Tag], base_url: str, limit: int) -> List[Dict]:
+    host = _host(base_url)
+    with metrics.stage('select', host):
+        items, date_seconds = _select_items(plan, elements, base_url, host, limit)
+    metrics.record_stage('dates', host, date_seconds)
+    return items
+
+
+def _select_items(plan, elements: Iterable[Tag], base_url: str, host: str,
+                  limit: int) -> Tuple[List[Dict], float]:
     items: List[Dict] = []
+    date_seconds = 0.0
 
-    # We will dynamically fetch article-level selectors per external host when needed
-    
-    for item_el in soup.select(item_selector):
+    for item_el in elements:
         if len(items) >= limit:
             break
 
-        title_el = item_el.select_one(mapping.get('title_selector')) if mapping.get('title_selector') else None
-        link_el = item_el.select_one(mapping.get('link_selector')) if mapping.get('link_selector') else None
-        content_el = item_el.select_one(mapping.get('content_selector')) if mapping.get('content_selector') else None
-        date_el = item_el.select_one(mapping.get('date_selector')) if mapping.get('date_selector') else None
-        author_el = item_el.select_one(mapping.get('author_selector')) if mapping.get('author_selector') else None
-        image_el = item_el.select_one(mapping.get('image_selector')) if mapping.get('image_selector') else None
-
-        title = text_of(title_el)
+        title = text_of(plan.select(item_el, 'title'))
+        link_el = plan.select(item_el, 'link')
         link = link_el['href'] if link_el and link_el.has_attr('href') else None
         if link:
             link = urljoin(base_url, link)
 
-        content = text_of(content_el)
-        date_text = text_of(date_el)
-        pub_date = parse_date(date_text)
-        author = text_of(author_el)
-        image_url = None
-        if image_el:
-            if image_el.name == 'img' and image_el.has_attr('src'):
-                image_url = urljoin(base_url, image_el['src'])
-            elif image_el.has_attr('content'):
-                image_url = urljoin(base_url, image_el['content'])
-
-        # Fallback to article page if any field missing
-        if link and (not pub_date or not author or not content or not image_url):
-            host = link.split('/')[2]
-            extra_selectors = ARTICLE_SELECTOR_CACHE.get(host)
-            if extra_selectors is None:
-                art_html = fetch_html(link)
-                extra_selectors = llm_detect_article_fields(link, art_html) or {}
-            if extra_selectors:
-                art_html = fetch_html(link)
-                art_soup = BeautifulSoup(art_html, 'html.parser')
-                if not pub_date and extra_selectors.get('date_selector'):
-                    date_el = art_soup.select_one(extra_selectors['date_selector'])
-                    pub_date = parse_date(text_of(date_el))
-                if not author and extra_selectors.get('author_selector'):
-                    author = text_of(art_soup.select_one(extra_selectors['author_selector']))
-                if not content and extra_selectors.get('content_selector'):
-                    content = text_of(art_soup.select_one(extra_selectors['content_selector']))
-                if not image_url and extra_selectors.get('image_selector'):
-                    img_el = art_soup.select_one(extra_selectors['image_selector'])
-                    if img_el:
-                        if img_el.name == 'img' and img_el.has_attr('src'):
-                            image_url = urljoin(link, img_el['src'])
-                        elif img_el.has_attr('content'):
-                            image_url = urljoin(link, img_el['content'])
-                ARTICLE_SELECTOR_CACHE[host] = extra_selectors
-
         # Only accept items with title and link at minimum
         if not title or not link:
             continue
 
-        item = {
+        date_text = date_text_of(plan.select(item_el, 'date'))
+        start = time.perf_counter()
+        date = parse_date(date_text, host)
+        date_seconds += time.perf_counter() - start
+
+        items.append({
             'title': title,
             'link': link,
-            'content': content,
-            'date': pub_date.isoformat() if pub_date else None,
-            'author': author,
-            'image': image_url,
-        }
-        items.append(item)
+            'content': text_of(plan.select(item_el, 'content')),
+            'date': date,
+            'author': text_of(plan.select(item_el, 'author')),
+            'image': image_url_of(plan.select(item_el, 'image'), base_url),
+        })
+    return items, date_seconds
+
+
+def _parse_listing(plan, html: str, base_url: str):
+    with metrics.stage('parse', _host(base_url)):
+        return plan.parse_listing(html)
+
+
+def parse_items(html: str, base_url: str, mapping: Dict[str, str], limit: int = 20) -> List[Dict]:
+    """Extract items from an already fetched listing page (no article enrichment)."""
+    plan = plan_for(mapping)
+    return _items_from(plan, plan.items(_parse_listing(plan, html, base_url)), base_url, limit)
+
+
+# Streamed listings are first parsed once this much text has arrived, then again
+# when enough text for ``limit`` items should have arrived (at least double);
+# smaller pages are parsed exactly once.
+STREAM_PARSE_FROM = int(os.getenv('STREAM_PARSE_FROM', 256 * 1024))
+
+
+def _complete_items(plan, partial_html: str, base_url: str, limit: int) -> List[Dict]:
+    """Items from a truncated page, leaving out the match that may be cut off."""
+    elements = list(plan.items(_parse_listing(plan, partial_html, base_url)))
+    if len(elements) < 2:
+        return []
+    # The last match (and anything enclosing it) may end past the truncation point
+    last = elements[-1]
+    open_ids = {id(parent) for parent in last.parents}
+    elements = [el for el in elements[:-1] if id(el) not in open_ids]
+    return _items_from(plan, elements, base_url, limit)
+
+
+def parse_items_streaming(chunks: Iterable[str], base_url: str, mapping: Dict[str, str],
+                          limit: int = 20) -> List[Dict]:
+    """Like parse_items, but stops consuming ``chunks`` once ``limit`` items are complete."""
+    return _parse_stream(chunks, base_url, mapping, limit)[0]
+
+
+class _StreamParse:
+    """Buffer of a streamed listing, parsed early once enough text has arrived."""
+
+    def __init__(self, base_url: str, mapping: Dict[str, str], limit: int):
+        self.plan = plan_for(mapping)
+        self.base_url = base_url
+        self.limit = limit
+        self.parts: List[str] = []
+        self.size = 0
+        self.next_parse = STREAM_PARSE_FROM
+
+    def add(self, chunk: str) -> None:
+        self.parts.append(chunk)
+        self.size += len(chunk)
+
+    def due(self) -> bool:
+        return self.size >= self.next_parse
+
+    def early_items(self) -> Optional[List[Dict]]:
+        """``limit`` items if the text so far holds them; otherwise None and the next parse is scheduled."""
+        items = _complete_items(self.plan, ''.join(self.parts), self.base_url, self.limit)
+        if len(items) >= self.limit:
+            return items
+        # Extrapolate from the item density seen so far
+        expected = self.size * self.limit / len(items) if items else 0
+        self.next_parse = max(self.size * 2, int(expected * 1.1))
+        return None
+
+    def finish(self) -> Tuple[List[Dict], str]:
+        html = ''.join(self.parts)
+        plan = self.plan
+        return _items_from(plan, plan.items(_parse_listing(plan, html, self.base_url)), self.base_url,
+                           self.limit), html
+
+
+def _parse_stream(chunks: Iterable[str], base_url: str, mapping: Dict[str, str],
+                  limit: int) -> Tuple[List[Dict], Optional[str]]:
+    """parse_items_streaming plus the whole page, or None when reading stopped early."""
+    state = _StreamParse(base_url, mapping, limit)
+    chunks = iter(chunks)
+    try:
+        for chunk in chunks:
+            # Only look at the buffer when more data is coming; the final parse happens below
+            if state.due():
+                items = state.early_items()
+                if items is not None:
+                    return items, None
+            state.add(chunk)
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close:
+            close()
+    return state.finish()
+
+
+def extract_items_with_mapping(base_url: str, mapping: Dict[str, str], limit: int = 20,
+                               seen: Optional[Callable[[str], bool]] = None) -> List[Dict]:
+    """Items of a listing, following its pagination until ``limit`` items (see crawl_pages)."""
+    items, html = _parse_stream(stream_html(base_url), base_url, mapping, limit)
+    if html is not None:
+        crawl_pages(base_url, html, mapping, items, limit, seen)
+
+    # Fill missing fields from the article pages, fetched concurrently
+    enrich_items(items)
+    return items
+
+# -----------------------------------------------------------------------------
+# Pagination
+# -----------------------------------------------------------------------------
+
+# Listing pages read per extraction at most, the first one included
+LISTING_MAX_PAGES = int(os.getenv('LISTING_MAX_PAGES', 5))
+
+_NEXT_REL = re.compile(r'<(?:a|link)\b[^>]*\brel\s*=\s*["\']?next\b[^>]*>', re.IGNORECASE)
+_NEXT_TEXT = re.compile(
+    r'<a\b[^>]*>\s*(?:<[^>]+>\s*)*'
+    r'(?:older\s+(?:posts|entries|articles|stories)|next(?:\s+page)?|more\s+(?:posts|articles|stories))'
+    r'\s*(?:<[^>]+>\s*)*(?:[›»→]|&raquo;|&rsaquo;|&rarr;)?\s*(?:<[^>]+>\s*)*</a>',
+    re.IGNORECASE)
+_HREF = re.compile(r'\bhref\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))', re.IGNORECASE)
+# Page number or item offset in a listing URL: ?page=2, /page/2/, ?start=20 ...
+_PAGE_NUMBER = re.compile(r'([?&](?:page|paged|pg|start|offset|skip)=|/page/)(\d+)', re.IGNORECASE)
+
+
+def next_page_url(html: str, page_url: str, mapping: Dict[str, str]) -> Optional[str]:
+    """URL of the listing page after ``page_url``.
+
+    Uses the feed's ``next_page_selector`` when it has one, otherwise a
+    ``rel="next"`` link or an "Older posts" / "Next page" link.
+    """
+    selector = mapping.get('next_page_selector')
+    if selector:
+        el = parse_page(html).select_one(selector)
+        href = el.get('href') if el is not None else None
+    else:
+        href = None
+        for pattern in (_NEXT_REL, _NEXT_TEXT):
+            match = pattern.search(html)
+            if match:
+                found = _HREF.search(match.group(0))
+                if found:
+                    href = unescape(next(g for g in found.groups() if g is not None))
+                    break
+    if not href or href.startswith(('#', 'javascript:')):
+        return None
+    url = urljoin(page_url, href.strip())
+    return url if url != page_url else None
+
+
+def page_sequence(first_url: str, next_url: str) -> Optional[Callable[[int], str]]:
+    """``f(i)`` giving the URL ``i`` pages after ``next_url`` when the URLs only differ by a number.
+
+    Returns None when the next page cannot be predicted (cursors, opaque tokens).
+    """
+    matches = list(_PAGE_NUMBER.finditer(next_url))
+    if not matches:
+        return None
+    m = matches[-1]
+    prefix, number = m.group(1), int(m.group(2))
+    head, tail = next_url[:m.start(2)], next_url[m.end(2):]
+
+    same = [fm for fm in _PAGE_NUMBER.finditer(first_url) if fm.group(1).lower() == prefix.lower()]
+    if same and first_url[:same[-1].start(2)] == head and first_url[same[-1].end(2):] == tail:
+        step = number - int(same[-1].group(2))
+    else:
+        # The first page has no number at all: /blog/ -> /blog/page/2/, ?page=2 or ?start=20
+        if prefix.startswith('?') and tail:
+            tail_without = '?' + tail[1:]  # ?page=2&x=1 -> ?x=1
+        else:
+            tail_without = tail
+        if (next_url[:m.start(1)] + tail_without).rstrip('/?') != first_url.rstrip('/?'):
+            return None
+        step = 1 if number == 2 else number
+    if step <= 0:
+        return None
+    return lambda i: f'{head}{number + i * step}{tail}'
+
+
+def _crawl(first_url: str, html: str, mapping: Dict[str, str], items: List[Dict], limit: int,
+           seen: Optional[Callable[[str], bool]], parse: Callable = _call
+           ) -> Generator[List[str], List[Optional[str]], None]:
+    """Crawl state machine: yields URLs to fetch and is sent their HTML (None for failures).
+
+    Extends ``items`` in place. Stops at ``limit`` items, ``LISTING_MAX_PAGES``
+    pages, a page without new items, or a page with items ``seen`` already
+    knows (older pages are then already stored too).
+    """
+    if len(items) >= limit or (seen and any(seen(item['link']) for item in items)):
+        return
+    url = next_page_url(html, first_url, mapping)
+    if url is None:
+        return
+    sequence = page_sequence(first_url, url)
+    per_page = max(len(items), 1)
+    links = {item['link'] for item in items}
+    pages = 1
+    while url and pages < LISTING_MAX_PAGES:
+        if sequence is not None:
+            # Predictable URLs: fetch as many pages as should fill the limit at once
+            count = min(-(-(limit - len(items)) // per_page), LISTING_MAX_PAGES - pages)
+            urls = [sequence(pages - 1 + i) for i in range(count)]
+        else:
+            urls = [url]
+        bodies = yield urls
+
+        for page_url, body in zip(urls, bodies):
+            if body is None:
+                return
+            pages += 1
+            fresh = [item for item in parse(parse_items, body, page_url, mapping, limit)
+                     if item['link'] not in links]
+            if not fresh:
+                return
+            for item in fresh[:limit - len(items)]:
+                links.add(item['link'])
+                items.append(item)
+            if len(items) >= limit or (seen and any(seen(item['link']) for item in fresh)):
+                return
+        url = next_page_url(bodies[-1], urls[-1], mapping) if sequence is None else url
+
+
+def crawl_pages(first_url: str, html: str, mapping: Dict[str, str], items: List[Dict], limit: int,
+                seen: Optional[Callable[[str], bool]] = None, parse: Callable = _call,
+                deadline: Optional[float] = None) -> None:
+    """Add items from the pages after ``first_url`` (whose listing is ``html``) until ``limit``.
+
+    ``seen(link)`` tells whether the item store already has an item; the crawl
+    stops at the first page containing one. Predictable page URLs are fetched
+    concurrently. ``parse(fn, *args)`` runs the page parsing; the crawl stops,
+    keeping the items found so far, once ``deadline`` passes.
+    """
+    crawl = _crawl(first_url, html, mapping, items, limit, seen, parse)
+    try:
+        urls = next(crawl)
+        while True:
+            urls = crawl.send(_fetch_pages(urls, deadline))
+    except StopIteration:
+        pass
+    except TimeoutError:
+        print("Pagination stopped at the deadline", first_url)
+        crawl.close()
+
+
+def _fetch_pages(urls: List[str], deadline: Optional[float] = None) -> List[Optional[str]]:
+    timeout = fetch_timeout(deadline)
+
+    def fetch(url):
+        try:
+            return fetch_html(url, timeout)
+        except Exception as e:
+            print("Listing page error", url, e)
+            return None
+
+    if len(urls) == 1:
+        return [fetch(urls[0])]
+    with ThreadPoolExecutor(max_workers=len(urls)) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, fetch, url) for url in urls]
+        return [future.result() for future in futures]
+
+
+def dates_to_iso(items: List[Dict]) -> List[Dict]:
+    """Items with ISO-8601 date strings, for JSON responses."""
+    for item in items:
+        item['date'] = item['date'].isoformat() if item['date'] else None
+    return items
+
+# -----------------------------------------------------------------------------
+# Async variants (ASGI endpoints)
+# -----------------------------------------------------------------------------
+# Network waits happen on the event loop; parsing and the blocking LLM client
+# run on worker threads.
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():  # the waiting task may have been cancelled
+        future.set_result(None)
+
+
+async def _join_page_flight(url: str) -> Optional[str]:
+    """Wait, without holding a thread, for a running fetch of ``url``.
+
+    Returns its page, or None when there was none running or it stopped early.
+    """
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+    call = _PAGE_FLIGHTS.join(url, lambda: loop.call_soon_threadsafe(_resolve, done))
+    if call is None:
+        return None
+    await done
+    if call.error is not None:
+        raise call.error
+    return call.result
+
+
+# How often a leader on the event loop retries a page lock held by another process
+LOCK_POLL_INTERVAL = 0.05
+
+
+async def _lock_page_async(url: str):
+    """Take the page's cross-process lock without blocking the event loop (or holding a thread)."""
+    lock = _PAGE_FLIGHTS.file_lock(url)
+    while lock is not None and not lock.acquire(blocking=False):
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+    return lock
+
+
+async def fetch_html_async(url: str, timeout: int = 10, use_cache: bool = True) -> str:
+    """fetch_html through the async fetcher, sharing the same page caches and single-flight."""
+    cached = None
+    if use_cache:
+        cached, fresh = _cached_page(url)
+        if fresh:
+            _cache_result(url, 'hit')
+            return cached.body
+
+    call = _PAGE_FLIGHTS.start(url)
+    if call is None:
+        html = await _join_page_flight(url)
+        return html if html is not None else await fetch_html_async(url, timeout, use_cache)
+    html = error = lock = None
+    try:
+        lock = await _lock_page_async(url)
+        if use_cache:
+            cached, fresh = _cached_page(url)
+            if fresh:
+                # The leader in another process has just stored it
+                _cache_result(url, 'hit')
+                html = cached.body
+                return html
+        with metrics.stage('fetch', _host(url)):
+            resp = await default_async_fetcher.get(url, timeout=timeout, headers=_request_headers(cached))
+        metrics.page_fetched(_host(url), resp.status_code)
+        if cached and resp.status_code == 304:
+            _cache_result(url, 'revalidated')
+            html = _revalidated(cached)
+            return html
+        if use_cache:
+            _cache_result(url, 'miss')
+
+        resp.raise_for_status()
+        html = resp.text
+        if use_cache:
+            _store(url, resp, html)
+        return html
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        if lock is not None:
+            lock.release()
+        _PAGE_FLIGHTS.finish(url, call, html, error)
+
+
+async def stream_html_async(url: str, timeout: int = 10, raise_for_status: bool = True) -> AsyncIterator[str]:
+    """stream_html through the async fetcher, sharing the same per-URL single-flight."""
+    cached, fresh = _cached_page(url)
+    if fresh:
+        _cache_result(url, 'hit')
+        for piece in _slices(cached.body):
+            yield piece
+        return
+
+    call = _PAGE_FLIGHTS.start(url) if raise_for_status else None
+    if raise_for_status and call is None:
+        body = await _join_page_flight(url)
+        for piece in _slices(body if body is not None else await fetch_html_async(url, timeout)):
+            yield piece
+        return
+    body = error = lock = None
+    try:
+        if call is not None:
+            # Held for the whole stream, as in stream_html
+            lock = await _lock_page_async(url)
+            cached, fresh = _cached_page(url)
+            if fresh:
+                _cache_result(url, 'hit')
+                body = cached.body
+                for piece in _slices(body):
+                    yield piece
+                return
+        with metrics.stage('fetch', _host(url)):
+            resp = await default_async_fetcher.get(url, timeout=timeout, headers=_request_headers(cached),
+                                                   stream=True)
+        metrics.page_fetched(_host(url), resp.status_code)
+        try:
+            if cached and resp.status_code == 304:
+                _cache_result(url, 'revalidated')
+                body = _revalidated(cached)
+                for piece in _slices(body):
+                    yield piece
+                return
+            _cache_result(url, 'miss')
+            if raise_for_status:
+                resp.raise_for_status()
+            decoder = codecs.getincrementaldecoder(resp.encoding or 'utf-8')(errors='replace')
+            parts = []
+            raws = resp.aiter_bytes(STREAM_CHUNK)
+            try:
+                async for raw in raws:
+                    text = decoder.decode(raw)
+                    parts.append(text)
+                    yield text
+            except GeneratorExit:
+                if resp.is_success and call is not None and call.waiters > 0:
+                    # Stopped early while fetch_html callers wait: read and cache the rest for them
+                    async for raw in raws:
+                        parts.append(decoder.decode(raw))
+                    parts.append(decoder.decode(b'', final=True))
+                    body = ''.join(parts)
+                    _store(url, resp, body)
+                raise
+            parts.append(decoder.decode(b'', final=True))
+            yield parts[-1]
+            if resp.is_success:
+                body = ''.join(parts)
+                _store(url, resp, body)
+        finally:
+            await resp.aclose()
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        if lock is not None:
+            lock.release()
+        if call is not None:
+            # None (stopped early) makes waiting fetch_html callers fetch it themselves
+            _PAGE_FLIGHTS.finish(url, call, body, error)
+
+
+async def _parse_stream_async(chunks: AsyncIterator[str], base_url: str, mapping: Dict[str, str],
+                              limit: int) -> Tuple[List[Dict], Optional[str]]:
+    """_parse_stream over an async stream; the parsing runs on worker threads."""
+    state = _StreamParse(base_url, mapping, limit)
+    try:
+        async for chunk in chunks:
+            if state.due():
+                items = await asyncio.to_thread(state.early_items)
+                if items is not None:
+                    return items, None
+            state.add(chunk)
+    finally:
+        await chunks.aclose()
+    return await asyncio.to_thread(state.finish)
+
+
+async def enrich_items_async(items: List[Dict]) -> None:
+    """enrich_items with article pages fetched concurrently on the event loop."""
+    pending = [item for item in items if _needs_article(item)]
+    if not pending:
+        return
+    selectors = await asyncio.to_thread(_article_selectors, [item['link'] for item in pending])
+    pending = [item for item in pending if selectors[_host(item['link'])]]
+    if not pending:
+        return
+
+    slots = asyncio.Semaphore(ARTICLE_FETCH_WORKERS)
+    host_slots = {host: asyncio.Semaphore(ARTICLE_FETCH_PER_HOST) for host in selectors}
+
+    async def work(item):
+        host = _host(item['link'])
+        async with slots, host_slots[host]:
+            html = await fetch_html_async(item['link'])
+        await asyncio.to_thread(_fill_from_article, item, html, selectors[host])
+
+    with metrics.stage('enrich', _host(pending[0]['link'])):
+        results = await asyncio.gather(*(work(item) for item in pending), return_exceptions=True)
+    for item, result in zip(pending, results):
+        if isinstance(result, Exception):
+            print("Article enrichment error", item['link'], result)
+
+
+def _advance(crawl, bodies):
+    """Next URLs from a crawl, or None when it is done (StopIteration can't cross to_thread)."""
+    try:
+        return crawl.send(bodies)
+    except StopIteration:
+        return None
+
+
+async def crawl_pages_async(first_url: str, html: str, mapping: Dict[str, str], items: List[Dict], limit: int,
+                            seen: Optional[Callable[[str], bool]] = None) -> None:
+    """crawl_pages with the async fetcher; pages are parsed on a worker thread."""
+    crawl = _crawl(first_url, html, mapping, items, limit, seen)
+    urls = await asyncio.to_thread(_advance, crawl, None)
+    while urls:
+        bodies = await asyncio.gather(*(fetch_html_async(url) for url in urls), return_exceptions=True)
+        for url, body in zip(urls, bodies):
+            if isinstance(body, Exception):
+                print("Listing page error", url, body)
+        urls = await asyncio.to_thread(
+            _advance, crawl, [None if isinstance(body, Exception) else body for body in bodies])
+
+
+async def extract_items_async(base_url: str, mapping: Dict[str, str], limit: int = 20,
+                              seen: Optional[Callable[[str], bool]] = None) -> List[Dict]:
+    """extract_items_with_mapping on the event loop: streamed, early-exit parse of the first page."""
+    items, html = await _parse_stream_async(stream_html_async(base_url), base_url, mapping, limit)
+    if html is not None:
+        await crawl_pages_async(base_url, html, mapping, items, limit, seen)
+    await enrich_items_async(items)
+    return items
+
 
-    return items 
\ No newline at end of file
+async def auto_detect_async(url: str) -> Tuple[Dict[str, str], List[Dict]]:
+    html = await fetch_html_async(url)
+    mapping = await asyncio.to_thread(detect_selectors, url, html)
+    items = await extract_items_async(url, mapping, limit=5)
+    return mapping, dates_to_iso(items)
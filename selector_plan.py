@@ -0,0 +1,104 @@
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Iterator, Optional, Tuple
+
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+
+# lxml (in requirements.txt) parses several times faster than html.parser;
+# without it (e.g. a trimmed install) pages are parsed with html.parser
+try:
+    import lxml  # noqa: F401
+    _DEFAULT_PARSER = 'lxml'
+except ImportError:
+    _DEFAULT_PARSER = 'html.parser'
+
+HTML_PARSER = os.getenv('HTML_PARSER', _DEFAULT_PARSER)
+
+FIELDS = ('title', 'link', 'content', 'date', 'author', 'image')
+
+# "tag", ".class" or "tag.class": simple enough to build only the matching subtrees
+_SIMPLE_SELECTOR = re.compile(r'^\s*([a-zA-Z][\w-]*)?(?:\.([\w-]+))?\s*$')
+
+# -----------------------------------------------------------------------------
+# Selector plans
+# -----------------------------------------------------------------------------
+
+
+def _has_class(cls: str):
+    # While parsing, the class attribute may still be the raw space-separated string
+    def match(value) -> bool:
+        if not value:
+            return False
+        return cls in (value.split() if isinstance(value, str) else value)
+    return match
+
+
+def _strainer_for(selector: str) -> Optional[SoupStrainer]:
+    match = _SIMPLE_SELECTOR.match(selector)
+    if not match or not any(match.groups()):
+        return None
+    name, cls = match.groups()
+    return SoupStrainer(name or True, class_=_has_class(cls)) if cls else SoupStrainer(name)
+
+
+class SelectorPlan:
+    """All selectors of one mapping compiled once with soupsieve.
+
+    With html.parser, listing pages whose item selector is a simple
+    ``tag``/``.class`` compound are parsed with a ``SoupStrainer`` so only the
+    matching subtrees are built. With lxml, items are matched on the full
+    tree, as they are on article pages.
+    """
+
+    def __init__(self, mapping: Dict[str, str]):
+        item_selector = mapping.get('item_selector') or 'article'
+        self.item = soupsieve.compile(item_selector)
+        self.fields = {}
+        for field in FIELDS:
+            selector = mapping.get(f'{field}_selector')
+            if selector and selector.strip():
+                self.fields[field] = soupsieve.compile(selector)
+        self.strainer = _strainer_for(item_selector) if HTML_PARSER == 'html.parser' else None
+
+    def parse_listing(self, html: str) -> BeautifulSoup:
+        return BeautifulSoup(html, HTML_PARSER, parse_only=self.strainer)
+
+    def items(self, soup: BeautifulSoup) -> Iterator[Tag]:
+        return self.item.iselect(soup)
+
+    def select(self, el: Tag, field: str) -> Optional[Tag]:
+        pattern = self.fields.get(field)
+        return pattern.select_one(el) if pattern is not None else None
+
+
+@lru_cache(maxsize=512)
+def _cached_plan(key: Tuple[Tuple[str, str], ...]) -> SelectorPlan:
+    return SelectorPlan(dict(key))
+
+
+def plan_for(mapping: Dict[str, str]) -> SelectorPlan:
+    """Return the (cached) plan for a mapping; equal mappings share one plan."""
+    key = tuple(sorted((k, v) for k, v in mapping.items()
+                       if k.endswith('_selector') and isinstance(v, str)))
+    return _cached_plan(key)
+
+
+# Classes such as "post-1234" or "css-1x2y3z" differ between renders of the
+# same template and are never used in generated selectors or fingerprints.
+_VOLATILE_CLASS = re.compile(r'\d')
+
+
+def stable_classes(el: Tag):
+    return sorted(c for c in el.get('class', ()) if not _VOLATILE_CLASS.search(c))
+
+
+def signature(el: Tag) -> str:
+    """CSS compound for an element: its tag plus its stable classes."""
+    return el.name + ''.join('.' + soupsieve.escape(c) for c in stable_classes(el))
+
+
+def parse_page(html: str) -> BeautifulSoup:
+    """Parse a full page (article pages, detection) with the configured parser."""
+    return BeautifulSoup(html, HTML_PARSER)
@@ -0,0 +1,169 @@
+import hashlib
+import os
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: coalescing stays per process
+    fcntl = None
+
+# -----------------------------------------------------------------------------
+# Single-flight: concurrent calls for the same key share one execution
+# -----------------------------------------------------------------------------
+
+# Lock files used to coalesce work across worker processes on this host
+LOCK_DIR = os.getenv('LOCK_DIR', os.path.join(tempfile.gettempdir(), 'site2rss-locks'))
+
+
+class FileLock:
+    """Exclusive ``flock`` on a lock file; blocks other processes and threads until released."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Take the lock; without ``blocking``, returns False instead of waiting for it."""
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return False
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is not None:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+        self.callbacks: Optional[List[Callable[[], None]]] = []
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one.
+
+    The first caller (the leader) runs the function; callers that arrive while
+    it runs wait and receive its result or exception. With ``lock_dir`` the
+    leader also holds a file lock for the key, so leaders in other worker
+    processes queue behind it. The function should therefore start by checking
+    whatever shared cache the other process may just have filled.
+
+    ``stripes`` maps keys onto that many lock files instead of one per key, for
+    unbounded key spaces such as URLs. Leaders must not nest calls on one
+    striped instance, since two keys may share a file.
+    """
+
+    def __init__(self, lock_dir: Optional[str] = None, stripes: int = 0):
+        self.lock_dir = lock_dir
+        self.stripes = stripes
+        if lock_dir:
+            os.makedirs(lock_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def file_lock(self, key: Hashable) -> Optional[FileLock]:
+        """The cross-process lock for ``key``, or None without ``lock_dir``."""
+        if not self.lock_dir:
+            return None
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        name = str(int(digest, 16) % self.stripes) if self.stripes else digest
+        return FileLock(os.path.join(self.lock_dir, name + '.lock'))
+
+    def start(self, key: Hashable) -> Optional[_Call]:
+        """Become the leader for ``key`` without a function (e.g. a generator).
+
+        Returns None if a call is already running; otherwise callers of ``do``
+        wait until the returned call is passed to ``finish``. To coalesce with
+        other processes too, the leader holds ``file_lock(key)`` while it works
+        (and checks the shared cache once it has it), as ``do`` does.
+        """
+        with self._lock:
+            if key in self._calls:
+                return None
+            call = self._calls[key] = _Call()
+            return call
+
+    def finish(self, key: Hashable, call: _Call, result: Any = None, error: Optional[BaseException] = None) -> None:
+        call.result, call.error = result, error
+        self._settle(key, call)
+
+    def join(self, key: Hashable, on_done: Callable[[], None]) -> Optional[_Call]:
+        """Follow the running call for ``key`` without blocking (e.g. from an event loop).
+
+        ``on_done()`` is run by the thread finishing the call, after which its
+        ``result`` and ``error`` are set. Returns None if no call is running.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                call.callbacks.append(on_done)
+            return call
+
+    def _settle(self, key: Hashable, call: _Call) -> None:
+        with self._lock:
+            del self._calls[key]
+            callbacks, call.callbacks = call.callbacks, None
+        call.done.set()
+        for callback in callbacks:
+            callback()
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args,
+           wait_timeout: Optional[float] = None, **kwargs) -> Any:
+        """``fn(*args, **kwargs)``, or the result of the same call already running for ``key``.
+
+        A follower waits at most ``wait_timeout`` seconds for the leader, then
+        raises TimeoutError.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            if not call.done.wait(wait_timeout):
+                with self._lock:
+                    if call.callbacks is not None:
+                        call.waiters -= 1
+                raise TimeoutError(f'timed out after {wait_timeout:g}s waiting for {key!r}')
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        lock = self.file_lock(key)
+        try:
+            if lock is None:
+                call.result = fn(*args, **kwargs)
+            else:
+                with lock:
+                    call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._settle(key, call)
@@ -10,6 +10,8 @@ document.addEventListener('DOMContentLoaded', () => {
     const nameInput = document.getElementById('feed-name');
 
     const fields = ['item_selector', 'title_selector', 'link_selector', 'content_selector', 'date_selector', 'author_selector'];
+    // Typed in by hand (no picker)
+    const manualFields = ['next_page_selector'];
 
     // Initialize pick buttons with new CSS classes
     const pickerButtons = {};
@@ -258,7 +260,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
     function getMapping() {
         const mapping = {};
-        fields.forEach(f => {
+        fields.concat(manualFields).forEach(f => {
             mapping[f] = document.getElementById(f).value.trim();
         });
         return mapping;